@@ -63,7 +63,14 @@ def reset_search_queries(**kwargs):
         conn.reset_queries()
 
 
+from django.core import signals as django_signals
+
 if settings.DEBUG:
-    from django.core import signals as django_signals
     django_signals.request_started.connect(reset_search_queries)
 
+
+# Per-request, memoize identical searches (see ``SingleFlight``).
+from sanjab.utils.singleflight import single_flight
+django_signals.request_started.connect(single_flight.start_memo)
+django_signals.request_finished.connect(single_flight.clear_memo)
+
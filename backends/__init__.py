@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
+import collections
 import copy
 from copy import deepcopy
 from time import time
@@ -27,15 +28,26 @@ def log_query(func):
     """
     A decorator for pseudo-logging search queries. Used in the ``SearchBackend``
     to wrap the ``search`` method.
+
+    Every query's duration & outcome is also reported to the connection
+    router, so latency-aware routers can steer reads. Backends that swallow
+    errors (``SILENTLY_FAIL``) should flag them with a truthy ``failed`` key
+    in the returned dictionary.
     """
     def wrapper(obj, query_string, *args, **kwargs):
         start = time()
+        failed = True
 
         try:
-            return func(obj, query_string, *args, **kwargs)
+            results = func(obj, query_string, *args, **kwargs)
+            failed = isinstance(results, dict) and results.get('failed', False)
+            return results
         finally:
             stop = time()
 
+            from sanjab import connection_router
+            connection_router.record_query(obj.connection_alias, stop - start, failed=failed)
+
             if settings.DEBUG:
                 from sanjab import connections
                 connections[obj.connection_alias].queries.append({
@@ -50,6 +62,147 @@ def log_query(func):
     return wrapper
 
 
+#: Outcome of sending a batch of documents: the ids sent, the ids skipped as
+#: unchanged, ``(id, error)`` pairs for the documents the engine refused &
+#: the ids it still turned away (e.g. overloaded) after retrying, which may
+#: go through later.
+BulkResult = collections.namedtuple('BulkResult', ['indexed', 'skipped', 'failed', 'rejected'])
+BulkResult.__new__.__defaults__ = ((),)
+
+
+def _result_value(result, field, position=None):
+    if isinstance(result, dict):
+        # Raw results: the values the engine sorted by, as it returned them.
+        if field in ('score', '_score'):
+            return result.get('_score')
+
+        if position is not None and result.get('_sort') is not None:
+            return result['_sort'][position]
+
+        return result.get(field)
+
+    if field == '_score':
+        field = 'score'
+
+    return getattr(result, field, None)
+
+
+def _normalize_sort(sort_by):
+    """
+    Turns the sorts a search was run with (``(field, direction)`` pairs, or
+    Elasticsearch's ``'field'``, ``'field:desc'`` & ``{'field': {'order':
+    'desc'}}``) into a list of ``(field, descending)`` pairs.
+    """
+    normalized = []
+
+    if isinstance(sort_by, (six.string_types, dict)):
+        sort_by = [sort_by]
+
+    for sort in sort_by or []:
+        if isinstance(sort, six.string_types):
+            field, _, order = sort.partition(':')
+            # Elasticsearch sorts by score descending unless told otherwise.
+            normalized.append((field, (order or ('desc' if field == '_score' else 'asc')) == 'desc'))
+        elif isinstance(sort, dict):
+            for field, options in sort.items():
+                order = options.get('order', 'asc') if isinstance(options, dict) else options
+                normalized.append((field, order == 'desc'))
+        else:
+            field, direction = sort
+            normalized.append((field, direction == 'desc'))
+
+    return normalized
+
+
+def merge_search_results(partials, sort_by=None, start_offset=0, end_offset=None):
+    """
+    Merges the responses of the same search run against several connections
+    into a single response, as if a single engine held all the documents.
+
+    Each partial must have fetched its top ``end_offset`` hits (offset 0), so
+    the merged ``[start_offset:end_offset]`` window is exact. Hits are ordered
+    by ``sort_by`` when given, by score otherwise. Hit counts & facet counts
+    are summed.
+    """
+    results = []
+    hits = 0
+    facets = {}
+    spelling_suggestion = None
+
+    for partial in partials:
+        results.extend(partial.get('results', []))
+        hits += partial.get('hits', 0)
+
+        if spelling_suggestion is None:
+            spelling_suggestion = partial.get('spelling_suggestion')
+
+        for facet_type, field_facets in partial.get('facets', {}).items():
+            merged = facets.setdefault(facet_type, {})
+
+            for fieldname, counts in field_facets.items():
+                if facet_type == 'queries':
+                    merged[fieldname] = merged.get(fieldname, 0) + counts
+                else:
+                    totals = merged.setdefault(fieldname, {})
+
+                    for value, count in counts:
+                        totals[value] = totals.get(value, 0) + count
+
+    for facet_type, field_facets in facets.items():
+        if facet_type == 'queries':
+            continue
+
+        for fieldname, totals in field_facets.items():
+            if facet_type == 'dates':
+                field_facets[fieldname] = sorted(totals.items())
+            else:
+                field_facets[fieldname] = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    sort_fields = _normalize_sort(sort_by)
+
+    if sort_fields:
+        # Stable sorts, least significant key first. Missing values sort last
+        # either way.
+        for position in reversed(range(len(sort_fields))):
+            field, descending = sort_fields[position]
+            values = lambda result: _result_value(result, field, position)
+
+            if descending:
+                key = lambda result: (values(result) is not None, values(result))
+            else:
+                key = lambda result: (values(result) is None, values(result))
+
+            results.sort(key=key, reverse=descending)
+    else:
+        results.sort(key=lambda result: _result_value(result, 'score') or 0, reverse=True)
+
+    return {
+        'results': results[start_offset:end_offset],
+        'hits': hits,
+        'facets': facets,
+        'aggregations': partials[0].get('aggregations', {}) if partials else {},
+        'spelling_suggestion': spelling_suggestion,
+        'failed': bool(partials) and all(partial.get('failed', False) for partial in partials),
+    }
+
+
+_fan_out_pool = None
+
+
+def get_fan_out_pool():
+    """
+    Returns the thread pool fan-out searches run on, sized by
+    ``SANJAB_FAN_OUT_WORKERS`` (8 by default).
+    """
+    global _fan_out_pool
+
+    if _fan_out_pool is None:
+        from multiprocessing.pool import ThreadPool
+        _fan_out_pool = ThreadPool(getattr(settings, 'SANJAB_FAN_OUT_WORKERS', 8))
+
+    return _fan_out_pool
+
+
 class EmptyResults(object):
     hits = 0
     docs = []
@@ -79,6 +232,8 @@ class BaseSearchBackend(object):
         self.batch_size = connection_options.get('BATCH_SIZE', 1000)
         self.silently_fail = connection_options.get('SILENTLY_FAIL', True)
         self.distance_available = connection_options.get('DISTANCE_AVAILABLE', False)
+        self.async_max_workers = connection_options.get('ASYNC_MAX_WORKERS', 10)
+        self._async_transport = None
 
     def update(self, index, iterable):
         """
@@ -138,6 +293,27 @@ class BaseSearchBackend(object):
         # extension easier.
         raise NotImplementedError
 
+    def get_async_transport(self):
+        """
+        Returns the ``AsyncTransport`` used by the ``a*`` search methods,
+        creating it on first use.
+
+        Backends talking to a remote engine should override this to give the
+        transport its own client (and so its own connection pool).
+        """
+        if self._async_transport is None:
+            from sanjab.utils.aio import AsyncTransport
+            self._async_transport = AsyncTransport(max_workers=self.async_max_workers)
+
+        return self._async_transport
+
+    def asearch(self, query_string, **kwargs):
+        """
+        Awaitable counterpart of ``search``. Runs the search on the async
+        transport and resolves to the same dictionary ``search`` returns.
+        """
+        return self.get_async_transport().submit(self.search, query_string, **kwargs)
+
     def prep_value(self, value):
         """
         Hook to give the backend a chance to prep an attribute value before
@@ -467,6 +643,8 @@ class BaseSearchQuery(object):
         # Internal.
         self._raw_query = None
         self._raw_query_params = {}
+        # Aliases a fan-out search is scattered across, if any.
+        self.fan_out_aliases = []
         self._more_like_this = False
         self._mlt_instance = None
         self._results = None
@@ -569,13 +747,70 @@ class BaseSearchQuery(object):
         search_kwargs = self.build_params(spelling_query=spelling_query)
         if kwargs:
             search_kwargs.update(kwargs)
-        results = self.backend.search(final_query, **search_kwargs)
+        results = self.backend_search('search', final_query, **search_kwargs)
         self._results = results.get('results', [])
         self._hit_count = results.get('hits', 0)
         self._facet_counts = self.post_process_facets(results)
         self._aggregations = results.get('aggregations', {})
         self._spelling_suggestion = results.get('spelling_suggestion', None)
 
+    def set_fan_out_aliases(self, aliases=None):
+        """
+        Makes the query run against every alias in ``aliases`` (by default,
+        those the routers return for ``for_read(fan_out=True)``) & merge the
+        results. See ``fan_out_search``.
+        """
+        from sanjab import connection_router
+
+        if not aliases:
+            aliases = connection_router.for_read(fan_out=True, models=self.models)
+
+            if not isinstance(aliases, (list, tuple)):
+                aliases = [aliases]
+
+        self.fan_out_aliases = []
+
+        for alias in aliases:
+            if alias and alias not in self.fan_out_aliases:
+                self.fan_out_aliases.append(alias)
+
+    def backend_search(self, method, query, **search_kwargs):
+        """
+        Runs ``query`` through the backend's ``search``/``raw_search`` method,
+        scattering it across ``fan_out_aliases`` when set.
+        """
+        if not self.fan_out_aliases:
+            return getattr(self.backend, method)(query, **search_kwargs)
+
+        return self.fan_out_search(method, query, **search_kwargs)
+
+    def fan_out_search(self, method, query, **search_kwargs):
+        """
+        Runs the same search concurrently against every alias in
+        ``fan_out_aliases`` and merges the responses.
+
+        Each connection is asked for its own top ``end_offset`` hits, so the
+        merged page is correct whatever the distribution of documents.
+        """
+        from sanjab import connections
+        start_offset = search_kwargs.get('start_offset') or 0
+        end_offset = search_kwargs.get('end_offset')
+        shard_kwargs = dict(search_kwargs, start_offset=0)
+
+        if method == 'raw_search':
+            sort_by = query.get('sort')
+        else:
+            sort_by = search_kwargs.get('sort_by')
+
+        def run_on(alias):
+            backend = connections[alias].get_backend()
+            # Backends may add paging to the query they're given.
+            return getattr(backend, method)(deepcopy(query), **shard_kwargs)
+
+        partials = get_fan_out_pool().map(run_on, self.fan_out_aliases)
+        return merge_search_results(partials, sort_by=sort_by,
+                                    start_offset=start_offset, end_offset=end_offset)
+
     def run_mlt(self, **kwargs):
         """
         Executes the More Like This. Returns a list of search results similar
@@ -605,7 +840,7 @@ class BaseSearchQuery(object):
         search_kwargs.update(self._raw_query_params)
         if kwargs:
             search_kwargs.update(kwargs)
-        results = self.backend.raw_search(self._raw_query, **search_kwargs)
+        results = self.backend_search('raw_search', self._raw_query, **search_kwargs)
         self._results = results.get('results', [])
         self._hit_count = results.get('hits', 0)
         self._facet_counts = results.get('facets', {})
@@ -1032,6 +1267,7 @@ class BaseSearchQuery(object):
         clone.distance_point = self.distance_point.copy()
         clone._raw_query = self._raw_query
         clone._raw_query_params = self._raw_query_params
+        clone.fan_out_aliases = self.fan_out_aliases[:]
 
         return clone
 
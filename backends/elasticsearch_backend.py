@@ -11,25 +11,35 @@ from django.db.models.loading import get_model
 from django.utils import six
 
 import sanjab
-from sanjab.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery, log_query
-from sanjab.constants import DEFAULT_OPERATOR, DJANGO_CT, DJANGO_ID, ID
+from sanjab.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery, BulkResult, log_query
+from sanjab.constants import CONTENT_HASH, DEFAULT_OPERATOR, DJANGO_CT, DJANGO_ID, ID
 from sanjab.exceptions import MissingDependency, MoreLikeThisError
+from sanjab.fields import batch_render
 from sanjab.inputs import Clean, Exact, PythonData, Raw
 from sanjab.models import SearchResult
 from sanjab.utils import log as logging
 from sanjab.utils import get_identifier, get_model_ct
+from sanjab.utils.singleflight import single_flight, request_key
+from sanjab.utils.stores import DocumentHashStore, FileCheckpointStore, FileHashStore, document_hash
 
 log = logging.getLogger('sanjab')
 
 
 try:
     import elasticsearch
-    from elasticsearch.helpers import bulk_index
     from elasticsearch.exceptions import NotFoundError
+    from elasticsearch.helpers import scan
+    from sanjab.elasticsearch.connections import connections as es_connections, ASYNC_SUFFIX
+    from sanjab.utils.bulk import BulkSender
+    from sanjab.utils.spool import Spool, is_unavailable
 except ImportError:
     raise MissingDependency("The 'elasticsearch' backend requires the installation of 'elasticsearch'. Please refer to the documentation.")
 
 
+# Numeric copy of ``DJANGO_ID``, which pk buckets are aggregated on (see
+# ``get_bucket_stats``).
+DJANGO_ID_NUMERIC = '%s.int' % DJANGO_ID
+
 DATETIME_REGEX = re.compile(
     r'^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})T'
     r'(?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})(\.\d+)?$')
@@ -119,13 +129,37 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         if 'DEFAULT_ANALYZER' in connection_options:
             self.DEFAULT_ANALYZER = connection_options['DEFAULT_ANALYZER']
 
-        self.conn = elasticsearch.Elasticsearch(connection_options['URL'], timeout=self.timeout, **connection_options.get('KWARGS', {}))
         self.index_name = connection_options['INDEX_NAME']
+        self.single_flight = connection_options.get('SINGLE_FLIGHT', True)
+        self.skip_unchanged = connection_options.get('SKIP_UNCHANGED', False)
+        self.hash_store_path = connection_options.get('HASH_STORE_PATH')
+        self._hash_store = None
+        self.checkpoint_path = connection_options.get('CHECKPOINT_PATH')
+        self._checkpoint_store = None
+        self.bulk_options = {
+            'max_bytes': connection_options.get('BULK_MAX_BYTES', 5 * 1024 * 1024),
+            'min_bytes': connection_options.get('BULK_MIN_BYTES', 64 * 1024),
+            'target_latency': connection_options.get('BULK_TARGET_LATENCY', 1.0),
+            'max_retries': connection_options.get('BULK_MAX_RETRIES', 3),
+            'initial_backoff': connection_options.get('BULK_INITIAL_BACKOFF', 0.5),
+        }
+        self._bulk_sender = None
+        self.spool_path = connection_options.get('SPOOL_PATH')
+        self.spool_drain_interval = connection_options.get('SPOOL_DRAIN_INTERVAL', 5.0)
+        self._spool = None
         self.log = logging.getLogger('sanjab')
         self.setup_complete = False
         self.content_field_name = None
         self.existing_mapping = {}
 
+    @property
+    def conn(self):
+        """
+        The ``Elasticsearch`` client for this connection, shared through the
+        ``sanjab.elasticsearch.connections`` registry with the DSL layer.
+        """
+        return es_connections.get_connection(self.connection_alias)
+
     def setup(self):
         """
         Defers loading until needed.
@@ -168,6 +202,39 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
                 self.conn.indices.put_mapping(doc_type=doc_type, body=current_mapping, index=self.index_name)
         self.setup_complete = True
 
+    def get_async_transport(self):
+        if self._async_transport is None:
+            from sanjab.utils.aio import AsyncTransport
+            self._async_transport = AsyncTransport(max_workers=self.async_max_workers,
+                                                   client_factory=self._build_async_client)
+
+        return self._async_transport
+
+    def _build_async_client(self, max_workers):
+        # The async transport gets its own client so its connection pool is
+        # sized for its workers & doesn't compete with synchronous requests.
+        return es_connections.get_connection(self.connection_alias + ASYNC_SUFFIX)
+
+    def _search_request(self, body, doc_types):
+        """
+        Sends a search request. Unless ``SINGLE_FLIGHT`` is disabled for the
+        connection, identical concurrent requests share one HTTP call & their
+        responses are memoized for the rest of the current request.
+        """
+        if not self.single_flight:
+            return self._send_search(body, doc_types)
+
+        key = request_key(self.connection_alias, self.index_name, body, sorted(doc_types))
+        return single_flight.do(key, self._send_search, body, doc_types)
+
+    def _send_search(self, body, doc_types):
+        conn = self.conn
+
+        if self._async_transport is not None:
+            conn = self._async_transport.client_for(conn)
+
+        return conn.search(body=body, index=self.index_name, doc_type=','.join(doc_types))
+
     def get_doc_mapping(self, doc_type):
         if not self.existing_mapping \
                 or doc_type not in self.existing_mapping[self.index_name]['mappings']:
@@ -175,55 +242,370 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         return self.existing_mapping[self.index_name]['mappings'][doc_type]
 
     def update(self, index, doc_type, iterable, commit=True, multilingual=True):
+        return self.bulk_update(doc_type, self.prepare_documents(index, iterable), commit=commit)
+
+    def prepare_documents(self, index, iterable):
+        """
+        Prepares the objects of ``iterable`` with ``index``, returning the
+        documents ready to be sent by ``bulk_update``.
+        """
+        prepped_docs = []
+
+        # Templated fields of the whole batch share one template ``Context``.
+        with batch_render():
+            for obj in iterable:
+                try:
+                    prepped_data = index.full_prepare(obj)
+                    if not prepped_data:
+                        continue
+
+                    prepped_docs.append(self.finalize_document(prepped_data))
+                except elasticsearch.TransportError as e:
+                    if not self.silently_fail:
+                        raise
+
+                    # We'll log the object identifier but won't include the actual object
+                    # to avoid the possibility of that generating encoding errors while
+                    # processing the log message:
+                    self.log.error(u"%s while preparing object for update" % e.__class__.__name__, exc_info=True, extra={
+                        "data": {
+                            "index": index,
+                            "object": get_identifier(obj)
+                        }
+                    })
+
+        return prepped_docs
+
+    def finalize_document(self, prepped_data):
+        """
+        Turns a prepared document (as returned by ``full_prepare``) into the
+        one sent to Elasticsearch.
+        """
+        # Most values are converted by the client's serializer (see
+        # ``SanjabJSONSerializer``) as the request is encoded. Byte strings
+        # can't wait: on Python 2 the encoder takes them as is & fails the
+        # whole request on invalid UTF-8. Sets are converted too, for clients
+        # built without that serializer.
+        final_data = {}
+
+        for key, value in prepped_data.items():
+            if isinstance(value, six.binary_type):
+                value = six.text_type(value, 'utf-8', 'replace')
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                value = [six.text_type(item, 'utf-8', 'replace') if isinstance(item, six.binary_type) else item
+                         for item in value]
+
+            final_data[key] = value
+
+        final_data['_id'] = final_data[ID]
+
+        return final_data
+
+    def get_hash_store(self):
+        """
+        Returns the store of document content hashes used by
+        ``SKIP_UNCHANGED``: a local file if ``HASH_STORE_PATH`` is set, the
+        documents' own ``CONTENT_HASH`` field otherwise.
+        """
+        if self._hash_store is None:
+            if self.hash_store_path:
+                self._hash_store = FileHashStore(self.hash_store_path)
+            else:
+                self._hash_store = DocumentHashStore(self)
+
+        return self._hash_store
+
+    def get_checkpoint_store(self):
+        """
+        Returns the store of incremental indexing checkpoints, kept in the
+        file named by ``CHECKPOINT_PATH`` (``None`` if not configured).
+        """
+        if self._checkpoint_store is None and self.checkpoint_path:
+            self._checkpoint_store = FileCheckpointStore(self.checkpoint_path)
+
+        return self._checkpoint_store
+
+    def get_content_hashes(self, doc_type, ids):
+        """Fetches the ``CONTENT_HASH`` of the documents ``ids`` in bulk."""
+        if not ids:
+            return {}
+
+        response = self.conn.mget(body={'ids': list(ids)}, index=self.index_name,
+                                  doc_type=doc_type, _source_include=CONTENT_HASH)
+        hashes = {}
+
+        for doc in response.get('docs', []):
+            doc_hash = doc.get('_source', {}).get(CONTENT_HASH)
+
+            if doc.get('found') and doc_hash:
+                hashes[doc['_id']] = doc_hash
+
+        return hashes
+
+    def skip_unchanged_documents(self, doc_type, docs):
+        """
+        Hashes ``docs`` & drops the ones whose content hash matches the
+        stored one. Returns ``(changed_docs, skipped_ids, new_hashes)``.
+        """
+        new_hashes = {}
+
+        for doc in docs:
+            doc[CONTENT_HASH] = new_hashes[doc['_id']] = document_hash(doc)
+
+        try:
+            stored = self.get_hash_store().get_many(doc_type, list(new_hashes.keys()))
+        except elasticsearch.TransportError as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error("Failed to fetch content hashes from Elasticsearch: %s", e)
+            stored = {}
+
+        changed, skipped = [], []
+
+        for doc in docs:
+            if stored.get(doc['_id']) == doc[CONTENT_HASH]:
+                skipped.append(doc['_id'])
+            else:
+                changed.append(doc)
+
+        return changed, skipped, new_hashes
+
+    def bulk_update(self, doc_type, docs, commit=True):
+        """
+        Sends already prepared documents (see ``prepare_documents``) to the
+        index.
+
+        With ``SKIP_UNCHANGED``, documents whose content hasn't changed since
+        they were last sent are dropped first. Returns a ``BulkResult``.
+        """
+        return self.bulk_update_many([(doc_type, docs)], commit=commit)
+
+    def bulk_update_many(self, docs_by_type, commit=True):
+        """
+        Like ``bulk_update``, for the documents of several doc types at once
+        (``(doc_type, docs)`` pairs), sent in a single bulk request.
+
+        With a ``SPOOL_PATH``, documents the cluster can't take right now are
+        spooled (see ``spool``) & reported as indexed.
+        """
+        if self.spooling():
+            # Don't overtake the changes waiting in the spool.
+            return self.spool_documents(docs_by_type)
+
         if not self.setup_complete:
             try:
                 self.setup()
             except elasticsearch.TransportError as e:
+                if self.spool_path and is_unavailable(e):
+                    return self.spool_documents(docs_by_type)
+
                 if not self.silently_fail:
                     raise
 
                 self.log.error("Failed to add documents to Elasticsearch: %s", e)
-                return
-        prepped_docs = []
+                return BulkResult([], [], [])
+
+        actions = []
+        skipped = []
+        sent_hashes = []
+
+        for doc_type, docs in docs_by_type:
+            if self.skip_unchanged:
+                docs, type_skipped, new_hashes = self.skip_unchanged_documents(doc_type, docs)
+                skipped.extend(type_skipped)
+                sent_hashes.append((doc_type, dict((doc['_id'], new_hashes[doc['_id']]) for doc in docs)))
+
+            # Each action names its doc type.
+            for doc in docs:
+                doc['_type'] = doc_type
 
-        for obj in iterable:
+            actions.extend(docs)
+
+        indexed, failed, rejected = [], [], []
+
+        if actions:
             try:
-                prepped_data = index.full_prepare(obj)
-                if not prepped_data:
-                    continue
-                final_data = {}
+                indexed, failed, rejected = self.get_bulk_sender().send(actions)
+            except elasticsearch.TransportError as e:
+                if not (self.spool_path and is_unavailable(e)):
+                    raise
+
+                self.log.warning("Spooling %d documents, Elasticsearch is unavailable: %s", len(actions), e)
+                self.spool(actions)
+                indexed, failed, rejected = [(doc['_type'], doc['_id']) for doc in actions], [], []
+
+            if rejected and self.spool_path:
+                spooled = set(rejected)
+                self.spool([doc for doc in actions if (doc['_type'], doc['_id']) in spooled])
+                indexed.extend(rejected)
+                rejected = []
+
+            for (doc_type, doc_id), error in failed:
+                self.log.error("Elasticsearch rejected document '%s' (%s): %s", doc_id, doc_type, error)
+
+            for doc_type, doc_id in rejected:
+                self.log.error("Elasticsearch still rejected document '%s' (%s) after %d retries.",
+                               doc_id, doc_type, self.bulk_options['max_retries'])
+
+            # Only what got indexed is known to be up to date.
+            indexed_keys = set(indexed)
+
+            for doc_type, hashes in sent_hashes:
+                hashes = dict((doc_id, doc_hash) for doc_id, doc_hash in hashes.items()
+                              if (doc_type, doc_id) in indexed_keys)
 
-                # Convert the data to make sure it's happy.
-                for key, value in prepped_data.items():
-                    final_data[key] = self._from_python(value)
-                final_data['_id'] = final_data[ID]
+                if hashes:
+                    self.get_hash_store().set_many(doc_type, hashes)
 
-                prepped_docs.append(final_data)
+        if commit:
+            self.refresh()
+
+        return BulkResult([doc_id for doc_type, doc_id in indexed], skipped,
+                          [(doc_id, error) for (doc_type, doc_id), error in failed],
+                          [doc_id for doc_type, doc_id in rejected])
+
+    def get_bulk_sender(self):
+        """
+        Returns the ``BulkSender`` sending documents in bulk, configured by
+        the ``BULK_*`` connection options.
+        """
+        if self._bulk_sender is None:
+            self._bulk_sender = BulkSender(self.conn, self.index_name, **self.bulk_options)
+
+        return self._bulk_sender
+
+    def get_spool(self):
+        """
+        Returns the ``Spool`` of this connection, kept in ``SPOOL_PATH``
+        (``None`` if not configured).
+        """
+        if self._spool is None and self.spool_path:
+            self._spool = Spool(self.spool_path, self.connection_alias, serializer=self.conn.transport.serializer)
+
+        return self._spool
+
+    def spooling(self):
+        """Tells whether changes are waiting in the spool."""
+        return self.spool_path is not None and self.get_spool().pending()
+
+    def spool(self, operations):
+        """
+        Durably records bulk ``operations`` the cluster couldn't take & makes
+        sure a background thread replays them once it's reachable again.
+        """
+        spool = self.get_spool()
+        spool.append(operations)
+        spool.start_drainer(self.replay_spooled, self.is_healthy, interval=self.spool_drain_interval)
+
+    def spool_documents(self, docs_by_type):
+        ids = []
+        actions = []
+
+        for doc_type, docs in docs_by_type:
+            for doc in docs:
+                doc['_type'] = doc_type
+                ids.append(doc['_id'])
+
+            actions.extend(docs)
+
+        if actions:
+            self.spool(actions)
+
+        return BulkResult(ids, [], [])
+
+    def replay_spooled(self, operations):
+        """
+        Sends spooled ``operations``. Raises if some couldn't be delivered,
+        so they stay in the spool.
+        """
+        done, failed, rejected = self.get_bulk_sender().send(operations)
+
+        for (doc_type, doc_id), error in failed:
+            self.log.error("Elasticsearch rejected spooled operation on '%s' (%s): %s", doc_id, doc_type, error)
+
+        if rejected:
+            raise elasticsearch.TransportError(429, "%d spooled operations were rejected" % len(rejected))
+
+    def is_healthy(self):
+        try:
+            return self.conn.ping()
+        except elasticsearch.TransportError:
+            return False
+
+    def refresh(self):
+        """Makes the changes sent so far visible to searches."""
+        self.conn.indices.refresh(index=self.index_name)
+
+    def partial_update(self, doc_type, obj, data, commit=True):
+        """
+        Merges ``data``, a partial document (see ``SearchIndex.prepare_fields``),
+        into the indexed document of ``obj``.
+
+        Returns ``False`` if the document isn't indexed yet, so the caller
+        sends the whole of it instead. So does a spooling connection, as
+        only whole documents are spooled.
+        """
+        doc_id = get_identifier(obj)
+
+        if self.spooling():
+            return False
+
+        if not self.setup_complete:
+            try:
+                self.setup()
             except elasticsearch.TransportError as e:
                 if not self.silently_fail:
                     raise
 
-                # We'll log the object identifier but won't include the actual object
-                # to avoid the possibility of that generating encoding errors while
-                # processing the log message:
-                self.log.error(u"%s while preparing object for update" % e.__class__.__name__, exc_info=True, extra={
-                    "data": {
-                        "index": index,
-                        "object": get_identifier(obj)
-                    }
-                })
-        bulk_index(self.conn, prepped_docs, index=self.index_name, doc_type=doc_type)
+                self.log.error("Failed to update document '%s' in Elasticsearch: %s", doc_id, e)
+                return True
 
-        if commit:
-            self.conn.indices.refresh(index=self.index_name)
+        data = dict(data)
+
+        if self.skip_unchanged:
+            # The stored hash no longer describes the whole document: forget
+            # it, so the next full update sends it again.
+            data[CONTENT_HASH] = None
+            self.get_hash_store().delete_many(doc_type, [doc_id])
+
+        try:
+            self.conn.update(index=self.index_name, doc_type=doc_type, id=doc_id, body={'doc': data})
+
+            if commit:
+                self.refresh()
+        except NotFoundError:
+            return False
+        except elasticsearch.TransportError as e:
+            if self.spool_path and is_unavailable(e):
+                return False
+
+            if not self.silently_fail:
+                raise
+
+            self.log.error("Failed to update document '%s' in Elasticsearch: %s", doc_id, e)
+
+        return True
 
     def remove(self, obj_or_string, doc_type, commit=True):
         doc_id = get_identifier(obj_or_string)
+        delete = {'_op_type': 'delete', '_type': doc_type, '_id': doc_id}
+
+        if self.skip_unchanged:
+            self.get_hash_store().delete_many(doc_type, [doc_id])
+
+        if self.spooling():
+            self.spool([delete])
+            return
 
         if not self.setup_complete:
             try:
                 self.setup()
             except elasticsearch.TransportError as e:
+                if self.spool_path and is_unavailable(e):
+                    self.spool([delete])
+                    return
+
                 if not self.silently_fail:
                     raise
 
@@ -236,17 +618,104 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
             if commit:
                 self.conn.indices.refresh(index=self.index_name)
         except elasticsearch.TransportError as e:
+            if self.spool_path and is_unavailable(e):
+                self.log.warning("Spooling the removal of '%s', Elasticsearch is unavailable: %s", doc_id, e)
+                self.spool([delete])
+                return
+
             if not self.silently_fail:
                 raise
 
             self.log.error("Failed to remove document '%s' from Elasticsearch: %s", doc_id, e)
 
+    def bulk_remove(self, doc_type, doc_ids, commit=True):
+        """Removes the documents ``doc_ids`` in bulk. Returns a ``BulkResult``."""
+        if self.skip_unchanged:
+            self.get_hash_store().delete_many(doc_type, doc_ids)
+
+        deletes = [{'_op_type': 'delete', '_type': doc_type, '_id': doc_id} for doc_id in doc_ids]
+        removed, failed, rejected = self.get_bulk_sender().send(deletes)
+
+        for (doc_type, doc_id), error in failed:
+            self.log.error("Failed to remove document '%s' from Elasticsearch: %s", doc_id, error)
+
+        for doc_type, doc_id in rejected:
+            self.log.error("Elasticsearch still rejected the removal of '%s' (%s) after %d retries.",
+                           doc_id, doc_type, self.bulk_options['max_retries'])
+
+        if commit:
+            self.refresh()
+
+        return BulkResult([doc_id for doc_type, doc_id in removed], [],
+                          [(doc_id, error) for (doc_type, doc_id), error in failed],
+                          [doc_id for doc_type, doc_id in rejected])
+
+    def get_bucket_stats(self, doc_type, bucket_size, updated_fieldname=None):
+        """
+        Aggregates the documents of ``doc_type`` into buckets of
+        ``bucket_size`` consecutive pks, in a single ``histogram``
+        aggregation.
+
+        Returns ``{bucket: (count, pk_sum, updated_sum)}`` (see
+        ``sanjab.utils.consistency.db_bucket_stats``). Documents whose pk
+        isn't an integer, or indexed before ``DJANGO_ID_NUMERIC`` was mapped,
+        are left out.
+        """
+        sums = {'pk_sum': {'sum': {'field': DJANGO_ID_NUMERIC}}}
+
+        if updated_fieldname:
+            sums['updated_sum'] = {'sum': {'field': updated_fieldname}}
+
+        body = {
+            'size': 0,
+            'aggs': {
+                'buckets': {
+                    'histogram': {'field': DJANGO_ID_NUMERIC, 'interval': bucket_size, 'min_doc_count': 1},
+                    'aggs': sums,
+                },
+            },
+        }
+        response = self.conn.search(index=self.index_name, doc_type=doc_type, body=body)
+        stats = {}
+
+        for bucket in response['aggregations']['buckets']['buckets']:
+            updated_sum = bucket.get('updated_sum', {}).get('value') or 0
+            stats[int(bucket['key']) // bucket_size] = (bucket['doc_count'],
+                                                        int(round(bucket['pk_sum']['value'] or 0)),
+                                                        int(round(updated_sum)))
+
+        return stats
+
+    def get_bucket_documents(self, doc_type, start, end, updated_fieldname=None):
+        """
+        Returns ``{pk: (doc_id, updated)}`` for the documents of ``doc_type``
+        with ``start <= pk < end``, ``updated`` being ``updated_fieldname`` in
+        milliseconds (``None`` without one).
+        """
+        fielddata = [DJANGO_ID_NUMERIC] + ([updated_fieldname] if updated_fieldname else [])
+        body = {
+            'query': {'filtered': {'filter': {'range': {DJANGO_ID_NUMERIC: {'gte': start, 'lt': end}}}}},
+            '_source': False,
+            'fielddata_fields': fielddata,
+        }
+        docs = {}
+
+        for hit in scan(self.conn, query=body, index=self.index_name, doc_type=doc_type):
+            fields = hit.get('fields', {})
+            updated = fields.get(updated_fieldname, [None])[0] if updated_fieldname else None
+            docs[int(fields[DJANGO_ID_NUMERIC][0])] = (hit['_id'], updated)
+
+        return docs
+
     def clear(self, doc_type=None, models=[], commit=True):
         # We actually don't want to do this here, as mappings could be
         # very different.
         # if not self.setup_complete:
         #     self.setup()
 
+        if self.skip_unchanged:
+            self.get_hash_store().clear()
+
         try:
             if doc_type:
                 # Delete the given doc type
@@ -512,23 +981,30 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
 
         query_body['from'] = kwargs.get('start_offset', 0)
 
+        failed = False
+
         try:
-            raw_results = self.conn.search(body=query_body,
-                                           index=self.index_name,
-                                           doc_type=','.join(doc_types))
+            raw_results = self._search_request(query_body, doc_types)
         except elasticsearch.TransportError as e:
             if not self.silently_fail:
                 raise
 
             self.log.error("Failed to query Elasticsearch using '%s': %s", query_body, e)
             raw_results = {}
+            failed = True
 
-        return self._process_results(raw_results,
-                                     doc_types=doc_types,
-                                     highlight=kwargs.get('highlight'),
-                                     result_class=kwargs.get('result_class', SearchResult),
-                                     distance_point=kwargs.get('distance_point'),
-                                     pocess_result_class=False)
+        results = self._process_results(raw_results,
+                                        doc_types=doc_types,
+                                        highlight=kwargs.get('highlight'),
+                                        result_class=kwargs.get('result_class', SearchResult),
+                                        distance_point=kwargs.get('distance_point'),
+                                        pocess_result_class=False)
+        results['failed'] = failed
+        return results
+
+    def araw_search(self, query_body, **kwargs):
+        """Awaitable counterpart of ``raw_search``."""
+        return self.get_async_transport().submit(self.raw_search, query_body, **kwargs)
 
     @log_query
     def search(self, query_string, doc_types={}, **kwargs):
@@ -563,21 +1039,24 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         # print '=' *20, ' query_body ', '='*20
         # print search_kwargs
         # print '=' * 80
+        failed = False
+
         try:
-            raw_results = self.conn.search(body=search_kwargs,
-                                           index=self.index_name,
-                                           doc_type=','.join(doc_types))
+            raw_results = self._search_request(search_kwargs, doc_types)
         except elasticsearch.TransportError as e:
             if not self.silently_fail:
                 raise
 
             self.log.error("Failed to query Elasticsearch using '%s': %s", query_string, e)
             raw_results = {}
-        return self._process_results(raw_results,
-                                     doc_types=doc_types,
-                                     highlight=kwargs.get('highlight'),
-                                     result_class=kwargs.get('result_class', SearchResult),
-                                     distance_point=kwargs.get('distance_point'), geo_sort=geo_sort)
+            failed = True
+        results = self._process_results(raw_results,
+                                        doc_types=doc_types,
+                                        highlight=kwargs.get('highlight'),
+                                        result_class=kwargs.get('result_class', SearchResult),
+                                        distance_point=kwargs.get('distance_point'), geo_sort=geo_sort)
+        results['failed'] = failed
+        return results
 
     def more_like_this(self, model_instance, additional_query_string=None,
                        start_offset=0, end_offset=None, models=None,
@@ -689,8 +1168,12 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
 
                     result = result_class(app_label, model_name, source[DJANGO_ID], raw_result['_score'], raw_result['_type'], **additional_fields)
             else:
-                result = source
+                # A copy: the response may be shared (see ``SINGLE_FLIGHT``).
+                result = dict(source)
                 result['pk'] = source[DJANGO_ID]
+                # Kept for merging fan-out results (see ``merge_search_results``).
+                result['_score'] = raw_result.get('_score')
+                result['_sort'] = raw_result.get('sort')
 
             results.append(result)
 
@@ -707,7 +1190,9 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         for doc_type, fields in index_fields.items():
             mapping = {
                 DJANGO_CT: {'type': 'string', 'index': 'not_analyzed', 'include_in_all': False},
-                DJANGO_ID: {'type': 'string', 'index': 'not_analyzed', 'include_in_all': False},
+                DJANGO_ID: {'type': 'string', 'index': 'not_analyzed', 'include_in_all': False,
+                            'fields': {'int': {'type': 'long', 'ignore_malformed': True}}},
+                CONTENT_HASH: {'type': 'string', 'index': 'no', 'include_in_all': False},
                 ID: {'type': 'string', 'index': 'not_analyzed'},
             }
             for field_name, field_class in fields.items():
@@ -1027,7 +1512,7 @@ class ElasticsearchSearchQuerySet(BaseSearchQuery):
         if kwargs:
             search_kwargs.update(kwargs)
 
-        results = self.backend.search(final_query, **search_kwargs)
+        results = self.backend_search('search', final_query, **search_kwargs)
         self._results = results.get('results', [])
         self._hit_count = results.get('hits', 0)
         self._facet_counts = self.post_process_facets(results)
@@ -2,8 +2,9 @@ from django.db.models import signals
 
 from sanjab.signals import BaseSignalProcessor
 from sanjab.exceptions import NotHandled
+from sanjab.utils.objectcache import invalidate_cached_object
 
-from sanjab.celery_worker.utils import enqueue_task
+from sanjab.celery_worker.utils import enqueue_batch, enqueue_task
 from sanjab.celery_worker.indexes import CelerySearchIndex
 
 
@@ -33,9 +34,11 @@ class CelerySignalProcessor(BaseSignalProcessor):
 
         for using in using_backends:
             try:
-                indexes = self.connections[using].get_unified_index().get_index(sender)
+                indexes = dict(self.connections[using].get_unified_index().get_index(sender))
                 if 'base' in indexes:
                     base = indexes.pop('base')
+                # Drop cached copies now rather than when the task runs.
+                invalidate_cached_object(sender, indexes.keys(), instance.pk)
                 for doc_type, index in indexes.iteritems():
                     if isinstance(index, CelerySearchIndex):
                         if action == 'update' and not index.should_update(instance):
@@ -45,3 +48,26 @@ class CelerySignalProcessor(BaseSignalProcessor):
             except NotHandled:
                 # TODO: Maybe log it or let the exception bubble?
                 pass
+
+            if action == 'update':
+                self.enqueue_related(sender, instance, using, **kwargs)
+
+    def enqueue_related(self, sender, instance, using, **kwargs):
+        """
+        Enqueues the update of the objects whose documents are built from
+        ``instance``, in batches, so the workers reindex them rather than
+        the request.
+        """
+        from sanjab.conf import SANJAB_CELERY_MAX_RELATED_UPDATES, SANJAB_CELERY_RELATED_BATCH_SIZE
+
+        unified_index = self.connections[using].get_unified_index()
+
+        for doc_type, index in unified_index.get_dependent_indexes(sender):
+            if not isinstance(index, CelerySearchIndex):
+                continue
+
+            pks = index.get_related_updates(sender, instance, update_fields=kwargs.get('update_fields'),
+                                            limit=SANJAB_CELERY_MAX_RELATED_UPDATES)
+
+            for start in range(0, len(pks), SANJAB_CELERY_RELATED_BATCH_SIZE):
+                enqueue_batch(index.get_model(), doc_type, pks[start:start + SANJAB_CELERY_RELATED_BATCH_SIZE])
@@ -2,7 +2,7 @@ from django.core.exceptions import ImproperlyConfigured
 from django.utils.importlib import import_module
 from django.db import connection
 
-from sanjab.utils import get_identifier
+from sanjab.utils import get_identifier, get_model_ct
 
 from sanjab.conf import settings
 
@@ -28,7 +28,18 @@ def enqueue_task(action, instance):
     Common utility for enqueing a task for the given action and
     model instance.
     """
-    identifier = get_identifier(instance)
+    apply_task(action, get_identifier(instance))
+
+
+def enqueue_batch(model, doc_type, pks):
+    """
+    Enqueues a single task reindexing the objects ``pks`` of ``model`` as
+    ``doc_type``.
+    """
+    apply_task('update_batch', get_model_ct(model), doc_type=doc_type, pks=list(pks))
+
+
+def apply_task(action, identifier, **task_kwargs):
     kwargs = {}
     if settings.CELERY_HAYSTACK_QUEUE:
         kwargs['queue'] = settings.CELERY_HAYSTACK_QUEUE
@@ -37,7 +48,7 @@ def enqueue_task(action, instance):
     task = get_update_task()
     if hasattr(connection, 'on_commit'):
         connection.on_commit(
-            lambda: task.apply_async((action, identifier), {}, **kwargs)
+            lambda: task.apply_async((action, identifier), task_kwargs, **kwargs)
         )
     else:
-        task.apply_async((action, identifier), {}, **kwargs)
+        task.apply_async((action, identifier), task_kwargs, **kwargs)
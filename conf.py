@@ -16,6 +16,10 @@ SANJAB_CELERY_DEFAULT_TASK = getattr(settings, 'SANJAB_CELERY_DEFAULT_TASK', 'sa
 SANJAB_CELERY_QUEUE = getattr(settings, 'SANJAB_CELERY_QUEUE', None)
 #: Whether the task should be handled transaction safe
 SANJAB_CELERY_TRANSACTION_SAFE = getattr(settings, 'SANJAB_CELERY_TRANSACTION_SAFE', True)
+#: The number of related objects reindexed per task after a save
+SANJAB_CELERY_RELATED_BATCH_SIZE = getattr(settings, 'SANJAB_CELERY_RELATED_BATCH_SIZE', 100)
+#: The most related objects queued for reindexing after a save
+SANJAB_CELERY_MAX_RELATED_UPDATES = getattr(settings, 'SANJAB_CELERY_MAX_RELATED_UPDATES', 10000)
 
 #: The batch size used by the CeleryHaystackUpdateIndex task
 SANJAB_CELERY_COMMAND_BATCH_SIZE = getattr(settings, 'SANJAB_CELERY_COMMAND_BATCH_SIZE',
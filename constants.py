@@ -7,6 +7,7 @@ DEFAULT_ALIAS = 'default'
 ID = getattr(settings, 'SANJAB_ID_FIELD', 'id')
 DJANGO_CT = getattr(settings, 'SANJAB_DJANGO_CT_FIELD', 'django_ct')
 DJANGO_ID = getattr(settings, 'SANJAB_DJANGO_ID_FIELD', 'django_id')
+CONTENT_HASH = getattr(settings, 'SANJAB_CONTENT_HASH_FIELD', 'content_hash')
 
 # Default operator. Valid options are AND/OR.
 DEFAULT_OPERATOR = getattr(settings, 'SANJAB_DEFAULT_OPERATOR', 'AND')
@@ -1,15 +1,104 @@
+import threading
+
 from six import string_types
 
 from elasticsearch import Elasticsearch
+from elasticsearch.connection import Urllib3HttpConnection
+
+from .serializer import SanjabJSONSerializer
+
+#: Suffix of the registry alias holding the async transport's client for a
+#: connection (e.g. ``default:async``).
+ASYNC_SUFFIX = ':async'
+
+
+class CompressedHttpConnection(Urllib3HttpConnection):
+    """
+    ``Urllib3HttpConnection`` that asks the cluster for gzip-compressed
+    responses (``http.compression`` must be enabled on the nodes). urllib3
+    decompresses them transparently.
+    """
+    def __init__(self, *args, **kwargs):
+        super(CompressedHttpConnection, self).__init__(*args, **kwargs)
+        self.pool.headers.update({'accept-encoding': 'gzip,deflate'})
+
+
+def client_kwargs_from_settings(options, maxsize=None):
+    """
+    Translates a ``SANJAB_CONNECTIONS`` entry into ``Elasticsearch`` client
+    keyword arguments.
+
+    Recognised options (all optional except ``URL``):
+
+        * ``POOL_MAXSIZE``: connections kept alive per host. Should match the
+          number of threads issuing requests concurrently in one process
+          (defaults to ``THREADS``, then 10).
+        * ``HTTP_COMPRESS``: ask for gzip-compressed responses.
+        * ``MAX_RETRIES``, ``RETRY_ON_TIMEOUT``, ``RETRY_ON_STATUS``: retry
+          policy for failed requests.
+        * ``DEAD_TIMEOUT``, ``TIMEOUT_CUTOFF``: back-off applied to a node
+          after it fails (doubles per consecutive failure, up to
+          ``DEAD_TIMEOUT * 2 ** TIMEOUT_CUTOFF``).
+        * ``SNIFF_ON_START``, ``SNIFF_ON_CONNECTION_FAIL``,
+          ``SNIFFER_TIMEOUT``: cluster sniffing.
+        * ``SERIALIZER``: dotted path of the serializer class used for every
+          request (bulk, search, scroll...). Defaults to
+          ``SanjabJSONSerializer``, which handles dates, sets & bytes.
+
+    Anything in ``KWARGS`` is passed through as-is and wins over the above.
+    """
+    kwargs = {
+        'hosts': options['URL'],
+        'timeout': options.get('TIMEOUT', 10),
+        'maxsize': maxsize or options.get('POOL_MAXSIZE', options.get('THREADS', 10)),
+    }
+    option_kwargs = (
+        ('MAX_RETRIES', 'max_retries'),
+        ('RETRY_ON_TIMEOUT', 'retry_on_timeout'),
+        ('RETRY_ON_STATUS', 'retry_on_status'),
+        ('DEAD_TIMEOUT', 'dead_timeout'),
+        ('TIMEOUT_CUTOFF', 'timeout_cutoff'),
+        ('SNIFF_ON_START', 'sniff_on_start'),
+        ('SNIFF_ON_CONNECTION_FAIL', 'sniff_on_connection_fail'),
+        ('SNIFFER_TIMEOUT', 'sniffer_timeout'),
+    )
+
+    for option, kwarg in option_kwargs:
+        if option in options:
+            kwargs[kwarg] = options[option]
+
+    serializer = options.get('SERIALIZER', SanjabJSONSerializer)
+
+    if isinstance(serializer, string_types):
+        from sanjab.utils.loading import import_class
+        serializer = import_class(serializer)
+
+    kwargs['serializer'] = serializer()
+
+    if options.get('HTTP_COMPRESS', False):
+        kwargs['connection_class'] = CompressedHttpConnection
+
+    kwargs.update(options.get('KWARGS', {}))
+
+    if maxsize:
+        kwargs['maxsize'] = maxsize
+
+    return kwargs
+
 
 class Connections(object):
     """
     Class responsible for holding connections to different clusters. Used as a
     singleton in this module.
+
+    Aliases that were not configured explicitly are looked up in
+    ``SANJAB_CONNECTIONS``, so the search backends & the DSL layer share a
+    single client (and connection pool) per connection.
     """
     def __init__(self):
         self._kwargs = {}
         self._conns = {}
+        self._lock = threading.Lock()
 
     def configure(self, **kwargs):
         """
@@ -25,7 +114,8 @@ class Connections(object):
             )
 
         Connections will only be constructed lazily when requested through
-        ``get_connection``.
+        ``get_connection``, with a ``SanjabJSONSerializer`` unless a
+        ``serializer`` is given.
         """
         for k in list(self._conns):
             # try and preserve existing client to keep the persistent connections alive
@@ -55,14 +145,49 @@ class Connections(object):
         if errors == 2:
             raise KeyError('There is no connection with alias %r.' % alias)
 
+    def reset(self):
+        """
+        Drops every constructed client, keeping the configuration. Needed
+        after forking, so child processes don't share sockets with the parent.
+        """
+        self._conns = {}
+
     def create_connection(self, alias='default', **kwargs):
         """
         Construct an instance of ``elasticsearch.Elasticsearch`` and register
         it under given alias.
         """
-        conn = self._conns[alias] = Elasticsearch(**kwargs)
+        conn = self._conns[alias] = Elasticsearch(**self._with_serializer(kwargs))
         return conn
 
+    def _with_serializer(self, kwargs):
+        # Indexes produce values (sets, bytes...) the client's own serializer
+        # doesn't handle, so use ours unless told otherwise.
+        if 'serializer' not in kwargs:
+            kwargs = dict(kwargs, serializer=SanjabJSONSerializer())
+
+        return kwargs
+
+    def _settings_kwargs(self, alias):
+        from django.conf import settings
+
+        connection_alias, is_async = alias, False
+
+        if alias.endswith(ASYNC_SUFFIX):
+            connection_alias, is_async = alias[:-len(ASYNC_SUFFIX)], True
+
+        options = getattr(settings, 'SANJAB_CONNECTIONS', {}).get(connection_alias)
+
+        if not options or 'URL' not in options:
+            raise KeyError(alias)
+
+        maxsize = None
+
+        if is_async:
+            maxsize = options.get('ASYNC_MAX_WORKERS', 10)
+
+        return client_kwargs_from_settings(options, maxsize=maxsize)
+
     def get_connection(self, alias='default'):
         """
         Retrieve a connection, construct it if necessary (only configuration
@@ -84,12 +209,19 @@ class Connections(object):
             pass
 
         # if not, try to create it
-        try:
-            conn = self._conns[alias] = Elasticsearch(**self._kwargs[alias])
-        except KeyError:
-            # no connection and no kwargs to set one up
-            raise KeyError('There is no connection with alias %r.' % alias)
-        else:
-            return conn
+        with self._lock:
+            if alias in self._conns:
+                return self._conns[alias]
+
+            try:
+                if alias not in self._kwargs:
+                    self._kwargs[alias] = self._settings_kwargs(alias)
+
+                conn = self._conns[alias] = Elasticsearch(**self._with_serializer(self._kwargs[alias]))
+            except KeyError:
+                # no connection and no kwargs to set one up
+                raise KeyError('There is no connection with alias %r.' % alias)
+            else:
+                return conn
 
 connections = Connections()
@@ -5,10 +5,13 @@ from django.utils import six
 
 from sanjab.backends import SQ
 from sanjab.utils import log as logging
+from sanjab.utils.hydration import BatchLoader, attach_stored_objects, load_objects
 from sanjab.exceptions import NotHandled
+from sanjab.models import SearchResult
 from sanjab import connections, connection_router
 from sanjab.constants import REPR_OUTPUT_SIZE, ITERATOR_LOAD_PER_QUERY, DEFAULT_OPERATOR
 
+from .connections import connections as es_connections
 from .query import Q, EMPTY_QUERY, Filtered
 from .filter import F, EMPTY_FILTER
 from .aggs import A, AggBase
@@ -115,6 +118,7 @@ class Search(object):
         self._result_count = None
         self._cache_full = False
         self._load_all = False
+        self._load_stored = False
         self._ignored_result_count = 0
         self.log = logging.getLogger('sanjab')
 
@@ -297,36 +301,15 @@ class Search(object):
 
         # Check if we wish to load all objects.
         if self._load_all:
-            result_indexes = {}
             models_doc_pks = {}
-            loaded_objects = {}
 
-            """
-            "Airline":{
-                "AirlineAll": {pk1, pk2, ...}
-            }
-            """
-            # Remember the search position for each result so we don't have to resort later.
+            # Group the pks by model & doc type, e.g.
+            # {Airline: {'AirlineAll': [pk1, pk2, ...]}}
             for result in results:
                 models_doc_pks.setdefault(result.model, {})
                 models_doc_pks[result.model].setdefault(result.doc_type, []).append(result.pk)
 
-            # Load the objects for each model in turn.
-            for model, modelResults in models_doc_pks.iteritems():
-                ui = connections[self._query._using].get_unified_index()
-                index = ui.get_index(model)
-                loaded_objects[model] = {}
-                for doc_type, doc_pks in modelResults.iteritems():
-                    model_index = index.get(doc_type, None)
-                    if not model_index:
-                        self.log.warning("IndexModel was not found for type: %s", doc_type)
-                    objects = model_index.read_queryset(using=self._query._using)
-                    try:
-                        loaded_objects[model].update(objects.in_bulk(doc_pks))
-                    except NotHandled:
-                        self.log.warning("Model '%s' not handled by the routers", model)
-                        # Revert to old behaviour
-                        loaded_objects[model].update(model._default_manager.in_bulk(doc_pks))
+            loaded_objects = load_objects(models_doc_pks, using=self._query._using)
 
         for result in results:
             if self._load_all:
@@ -347,6 +330,17 @@ class Search(object):
 
             to_cache.append(result)
 
+        # Raw searches hand back plain ``_source`` dicts, which hold the
+        # stored fields already & have no object to load.
+        searchresults = [result for result in to_cache if isinstance(result, SearchResult)]
+
+        if searchresults and not self._load_all:
+            if self._load_stored:
+                attach_stored_objects(searchresults, using=self._query._using)
+            else:
+                # Let the page's results load their objects together, on demand.
+                BatchLoader(searchresults, using=self._query._using).attach()
+
         return to_cache
 
     def _manual_iter(self):
@@ -445,6 +439,7 @@ class Search(object):
         s._highlight_opts = self._highlight_opts.copy()
         s._suggest = self._suggest.copy()
         s._load_all = self._load_all
+        s._load_stored = self._load_stored
         for x in ('query', 'filter', 'post_filter'):
             getattr(s, x)._proxied = getattr(self, x)._proxied
 
@@ -678,12 +673,47 @@ class Search(object):
         clone._using = connection_name
         return clone
 
+    def fan_out(self, *aliases):
+        """
+        Runs the search concurrently against several connections (e.g. one
+        per region) & merges the results by score or sort order, summing hit
+        & facet counts.
+
+        Without ``aliases``, every connection the routers return for
+        ``for_read(fan_out=True)`` is used.
+        """
+        clone = self._clone()
+        clone._query.set_fan_out_aliases(aliases)
+        return clone
+
     def execute(self):
         """
         Execute the search and return an instance of ``Response`` wrapping all
         the data.
         """
-        es = connections.get_connection(self._using)
+        es = es_connections.get_connection(self._query._using)
+
+        return Response(
+            es.search(
+                index=self._index,
+                doc_type=self._doc_type,
+                body=self.to_dict(),
+                **self._params
+            ),
+            callbacks=self._doc_type_map
+        )
+
+    def aexecute(self):
+        """
+        Awaitable counterpart of ``execute``. The request runs on the
+        backend's async transport, using its own connection pool, and
+        resolves to a ``Response``.
+        """
+        transport = self._query.backend.get_async_transport()
+        return transport.submit(self._execute_with, transport)
+
+    def _execute_with(self, transport):
+        es = transport.client_for(self._query.backend.conn)
 
         return Response(
             es.search(
@@ -700,7 +730,7 @@ class Search(object):
         return len(self)
 
     def scan(self):
-        es = connections.get_connection(self._using)
+        es = es_connections.get_connection(self._query._using)
 
         for hit in scan(
                 es,
@@ -765,6 +795,15 @@ class Search(object):
         clone._load_all = True
         return clone
 
+    def load_stored(self):
+        """
+        Populates the objects in the search results from their stored fields,
+        without touching the database. See ``StoredObjectProxy``.
+        """
+        clone = self._clone()
+        clone._load_stored = True
+        return clone
+
     def get_results(self, start=0, end=-1):
         if start == 0 and end == -1:
             return [result for result in self.load_all() if result]
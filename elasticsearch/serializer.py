@@ -0,0 +1,32 @@
+from datetime import date, datetime
+
+from six import binary_type, text_type
+
+from elasticsearch.serializer import JSONSerializer
+
+
+class SanjabJSONSerializer(JSONSerializer):
+    """
+    ``JSONSerializer`` that also understands the Python values indexes
+    produce, so documents can be handed to the client as prepared:
+
+        * dates & datetimes, in the ISO format the mappings expect (dates get
+          a ``T00:00:00`` time),
+        * sets & frozensets, as lists,
+        * byte strings the encoder doesn't take natively, decoded as UTF-8
+          (invalid bytes are replaced).
+
+    Subclasses can plug in a faster encoder by overriding ``dumps`` (and
+    ``loads``), falling back to ``default`` for the types above.
+    """
+    def default(self, data):
+        if isinstance(data, datetime):
+            return data.isoformat()
+        elif isinstance(data, date):
+            return '%sT00:00:00' % data.isoformat()
+        elif isinstance(data, (set, frozenset)):
+            return list(data)
+        elif isinstance(data, binary_type):
+            return text_type(data, 'utf-8', 'replace')
+
+        return super(SanjabJSONSerializer, self).default(data)
@@ -2,6 +2,8 @@
 from __future__ import unicode_literals
 
 import re
+import threading
+from contextlib import contextmanager
 
 from django.template import Context, loader
 from django.utils import datetime_safe, six
@@ -17,6 +19,28 @@ class NOT_PROVIDED:
 DATETIME_REGEX = re.compile('^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})(T|\s+)(?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2}).*?$')
 
 
+_render_state = threading.local()
+
+
+@contextmanager
+def batch_render():
+    """
+    Within the block, templated fields rendered on this thread share one
+    ``Context`` (each object is ``push``ed onto it & ``pop``ped off again)
+    rather than building a new one per object.
+    """
+    if getattr(_render_state, 'context', None) is not None:
+        yield
+        return
+
+    _render_state.context = Context()
+
+    try:
+        yield
+    finally:
+        _render_state.context = None
+
+
 # All the SearchFields variants.
 
 class SearchField(object):
@@ -26,12 +50,19 @@ class SearchField(object):
     def __init__(self, model_attr=None, use_template=False, template_name=None,
                  document=False, indexed=True, stored=True, faceted=False,
                  default=NOT_PROVIDED, null=False, index_fieldname=None,
-                 facet_class=None, boost=1.0, weight=0, analyzer=None, language=None):
+                 facet_class=None, boost=1.0, weight=0, analyzer=None, language=None,
+                 depends_on=None):
         # Track what the index thinks this field is called.
         self.instance_name = None
         self.model_attr = model_attr
+        # Split once, rather than on every ``prepare``.
+        self.model_attr_path = tuple(model_attr.split('__')) if model_attr else ()
         self.use_template = use_template
         self.template_name = template_name
+        # The model fields a template reads, for partial updates (see
+        # ``SearchIndex.get_field_dependencies``).
+        self.depends_on = tuple(depends_on) if depends_on is not None else None
+        self._templates = {}
         self.document = document
         self.indexed = indexed
         self.stored = stored
@@ -81,11 +112,10 @@ class SearchField(object):
         if self.use_template:
             return self.prepare_template(obj)
         elif self.model_attr is not None:
-            # Check for `__` in the field for looking through the relation.
-            attrs = self.model_attr.split('__')
+            # Look through the relation for `__`-separated model_attrs.
             current_object = obj
 
-            for attr in attrs:
+            for attr in self.model_attr_path:
                 if not hasattr(current_object, attr):
                     raise SearchFieldError("The model '%s' does not have a model_attr '%s'." % (repr(obj), attr))
 
@@ -115,29 +145,66 @@ class SearchField(object):
         else:
             return None
 
-    def prepare_template(self, obj):
+    def get_template(self, obj):
         """
-        Flattens an object for indexing.
+        Returns the compiled template used to flatten ``obj``.
 
-        This loads a template
-        (``search/indexes/{app_label}/{model_name}_{field_name}.txt``) and
-        returns the result of rendering that template. ``object`` will be in
-        its context.
+        Templates are resolved once per field (& model, for the default
+        template names) and cached for the life of the process.
         """
         if self.instance_name is None and self.template_name is None:
             raise SearchFieldError("This field requires either its instance_name variable to be populated or an explicit template_name in order to load the correct template.")
 
+        if self.template_name is not None:
+            key = None
+        else:
+            key = get_model_ct_tuple(obj)
+
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+
         if self.template_name is not None:
             template_names = self.template_name
 
             if not isinstance(template_names, (list, tuple)):
                 template_names = [template_names]
         else:
-            app_label, model_name = get_model_ct_tuple(obj)
-            template_names = ['search/indexes/%s/%s_%s.txt' % (app_label, model_name, self.instance_name)]
+            template_names = ['search/indexes/%s/%s_%s.txt' % (key[0], key[1], self.instance_name)]
+
+        t = self._templates[key] = loader.select_template(template_names)
+        return t
 
-        t = loader.select_template(template_names)
-        return t.render(Context({'object': obj}))
+    def prepare_template(self, obj):
+        """
+        Flattens an object for indexing.
+
+        This loads a template
+        (``search/indexes/{app_label}/{model_name}_{field_name}.txt``) and
+        returns the result of rendering that template. ``object`` will be in
+        its context.
+        """
+        t = self.get_template(obj)
+        context = getattr(_render_state, 'context', None)
+
+        if context is None:
+            return t.render(Context({'object': obj}))
+
+        context.push()
+        context['object'] = obj
+
+        try:
+            return t.render(context)
+        finally:
+            context.pop()
+
+    def prepare_template_many(self, objs):
+        """
+        Flattens several objects for indexing, reusing a single ``Context``.
+        """
+        with batch_render():
+            return [self.prepare_template(obj) for obj in objs]
 
     def convert(self, value):
         """
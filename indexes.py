@@ -1,18 +1,23 @@
 from __future__ import unicode_literals
 
 import copy
+import operator
 import threading
 import warnings
 import collections
+from functools import reduce
 
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q as DQ
 from django.utils.six import with_metaclass
 
 from sanjab import connection_router, connections
 from sanjab.constants import DEFAULT_ALIAS, DJANGO_CT, DJANGO_ID, ID, Indexable
+from sanjab.exceptions import SearchFieldError
 from sanjab.fields import *
 from sanjab.manager import SearchIndexManager
-from sanjab.utils import get_facet_field_name, get_identifier, get_model_ct
+from sanjab.utils import default_get_identifier, get_facet_field_name, get_identifier, get_model_ct, get_model_field
+from sanjab.utils import log as logging
 
 try:
     from django.utils.encoding import force_text
@@ -20,6 +25,31 @@ except ImportError:
     from django.utils.encoding import force_unicode as force_text
 
 
+PreparePlan = collections.namedtuple('PreparePlan', ['steps', 'facet_copies', 'nullable'])
+ValuesPlan = collections.namedtuple('ValuesPlan', ['columns', 'steps'])
+
+
+def _func(method):
+    # Unbound methods on Python 2, plain functions on Python 3.
+    return getattr(method, '__func__', method)
+
+
+def depends_on(*model_fields):
+    """
+    Declares which model fields a ``prepare_<field>`` method reads, so saves
+    with ``update_fields`` that don't touch them skip it::
+
+        @depends_on('first_name', 'last_name')
+        def prepare_name(self, obj):
+            return '%s %s' % (obj.first_name, obj.last_name)
+    """
+    def decorator(func):
+        func.depends_on = frozenset(model_fields)
+        return func
+
+    return decorator
+
+
 class DeclarativeMetaclass(type):
     def __new__(cls, name, bases, attrs):
         attrs['fields'] = {}
@@ -108,6 +138,25 @@ class SearchIndex(with_metaclass(DeclarativeMetaclass, threading.local)):
     """
     base = False  # Base Index for model
     type = None  # Base Index for model
+    # Follow ``model_attr`` relations with select/prefetch_related when
+    # building the queryset to index.
+    auto_select_related = True
+    # Let ``update_index`` build documents from ``values_list`` rows when the
+    # index allows it (see ``get_values_plan``).
+    use_values_path = True
+    # Hydration plan applied when loading the objects behind search results.
+    load_select_related = None
+    load_prefetch_related = None
+    load_only = None
+    # Extra relation lookups (e.g. ``'category'``) whose objects feed the
+    # documents, like templates do. Those ``model_attr`` walks through are
+    # tracked already (see ``get_related_dependencies``).
+    related_dependencies = ()
+    # Most objects a save of a related object reindexes within the saving
+    # request (``RealtimeSignalProcessor``), before the response goes out.
+    # When more depend on it, they're left to ``update_index`` (``None``: no
+    # cap). ``CelerySignalProcessor`` queues them in batches instead.
+    max_related_updates = 100
 
     def __init__(self):
         self.prepared_data = None
@@ -146,6 +195,28 @@ class SearchIndex(with_metaclass(DeclarativeMetaclass, threading.local)):
         """
         return self.index_queryset(using=using)
 
+    def hydration_queryset(self, using=None):
+        """
+        Get the QuerySet the objects behind search results are loaded from.
+
+        Applies the index's hydration plan to ``read_queryset``:
+        ``load_select_related``, ``load_prefetch_related`` & ``load_only``
+        (lists of lookups/field names), so templates walking relations of
+        the results don't each run their own queries.
+        """
+        queryset = self.read_queryset(using=using)
+
+        if self.load_select_related:
+            queryset = queryset.select_related(*self.load_select_related)
+
+        if self.load_prefetch_related:
+            queryset = queryset.prefetch_related(*self.load_prefetch_related)
+
+        if self.load_only:
+            queryset = queryset.only(*self.load_only)
+
+        return queryset
+
     def build_queryset(self, using=None, start_date=None, end_date=None):
         """
         Get the default QuerySet to index when doing an index update.
@@ -186,9 +257,252 @@ class SearchIndex(with_metaclass(DeclarativeMetaclass, threading.local)):
         if not hasattr(index_qs, 'filter'):
             raise ImproperlyConfigured("The '%r' class must return a 'QuerySet' in the 'index_queryset' method." % self)
 
-        # `.select_related()` seems like a good idea here but can fail on
-        # nullable `ForeignKey` as well as what seems like other cases.
-        return index_qs.filter(**extra_lookup_kwargs).order_by(model._meta.pk.name)
+        index_qs = index_qs.filter(**extra_lookup_kwargs).order_by(model._meta.pk.name)
+
+        if self.auto_select_related:
+            # A bare `.select_related()` can fail on nullable `ForeignKey`s, so
+            # only the relations the fields go through are named explicitly.
+            select_related, prefetch_related = self.get_related_lookups()
+
+            if select_related:
+                index_qs = index_qs.select_related(*select_related)
+
+            if prefetch_related:
+                index_qs = index_qs.prefetch_related(*prefetch_related)
+
+        return index_qs
+
+    def build_incremental_queryset(self, using=None, since=None):
+        """
+        Get the QuerySet to index incrementally, ordered by
+        ``(get_updated_field(), pk)`` & starting after the ``since`` checkpoint
+        (as returned by ``get_checkpoint``), if any.
+
+        Objects without an updated date are left out.
+        """
+        updated_field = self.get_updated_field()
+
+        if not updated_field:
+            raise ImproperlyConfigured("The '%r' class must provide 'get_updated_field' to be indexed incrementally." % self)
+
+        index_qs = self.build_queryset(using=using).filter(**{'%s__isnull' % updated_field: False})
+
+        if since is not None:
+            updated, pk = since
+            index_qs = index_qs.filter(
+                DQ(**{'%s__gt' % updated_field: updated}) |
+                DQ(**{updated_field: updated, 'pk__gt': pk})
+            )
+
+        return index_qs.order_by(updated_field, 'pk')
+
+    def get_checkpoint(self, obj):
+        """
+        Returns the ``(updated, pk)`` checkpoint incremental indexing resumes
+        after, once ``obj`` is indexed.
+        """
+        return (getattr(obj, self.get_updated_field()), obj.pk)
+
+    def get_related_lookups(self):
+        """
+        Works out which relations the fields' ``model_attr`` paths walk
+        through, so they can be fetched along with the objects being indexed.
+
+        Returns a ``(select_related, prefetch_related)`` pair of lookup lists.
+        Single-valued relations (forward ``ForeignKey``/``OneToOneField``,
+        reverse one-to-one) are joined in; as soon as a path crosses a
+        multi-valued relation, the rest of it is prefetched. Paths stop at the
+        first step that isn't a model field (a property or method).
+        """
+        select_related = set()
+        prefetch_related = set()
+
+        for field in self.fields.values():
+            if field.use_template or not field.model_attr_path:
+                continue
+
+            model = self.get_model()
+            lookup = []
+            # How much of the path can be joined in.
+            joined = None
+
+            for attr in field.model_attr_path:
+                found = get_model_field(model, attr)
+
+                if found is None or found[1] is None:
+                    break
+
+                if found[2] and joined is None:
+                    joined = len(lookup)
+
+                model = found[1]
+                lookup.append(attr)
+
+            if joined is None:
+                joined = len(lookup)
+
+            if joined:
+                select_related.add('__'.join(lookup[:joined]))
+
+            if len(lookup) > joined:
+                prefetch_related.add('__'.join(lookup))
+
+        # Drop lookups already covered by a longer one.
+        for lookups in (select_related, prefetch_related):
+            for lookup in list(lookups):
+                if any(other.startswith(lookup + '__') for other in lookups):
+                    lookups.discard(lookup)
+
+        return sorted(select_related), sorted(prefetch_related)
+
+    def get_related_dependencies(self):
+        """
+        Returns the related models the documents are built from, as
+        ``{related_model: [(lookup, model_fields), ...]}``, compiled on first
+        use.
+
+        ``lookup`` leads from the indexed model to the related one &
+        ``model_fields`` are the fields read from it (``None`` if unknown). They
+        come from every relation a ``model_attr`` path walks through, plus the
+        ``related_dependencies`` lookups.
+        """
+        dependencies = getattr(self, '_related_dependencies', None)
+
+        if dependencies is not None:
+            return dependencies
+
+        dependencies = {}
+        paths = [(field.model_attr_path, False) for field in self.fields.values()
+                 if not field.use_template and field.model_attr_path]
+        paths.extend((tuple(lookup.split('__')), True) for lookup in self.related_dependencies)
+
+        for path, declared in paths:
+            model = self.get_model()
+            lookup = []
+
+            for position, attr in enumerate(path):
+                found = get_model_field(model, attr)
+
+                if found is None or found[1] is None:
+                    if declared:
+                        raise SearchFieldError("'%s' in the related_dependencies of '%s' isn't a relation." % (
+                            '__'.join(path), self.__class__.__name__))
+
+                    break
+
+                model = found[1]
+                lookup.append(attr)
+
+                if declared and position < len(path) - 1:
+                    continue
+
+                # Reading a field of the related object, or anything else?
+                model_fields = None
+
+                if not declared and position < len(path) - 1:
+                    next_found = get_model_field(model, path[position + 1])
+
+                    if next_found is not None and next_found[1] is None:
+                        model_fields = frozenset([path[position + 1]])
+
+                dependencies.setdefault(model, []).append(('__'.join(lookup), model_fields))
+
+        self._related_dependencies = dependencies
+        return dependencies
+
+    def get_dependent_pks(self, related_model, pk, update_fields=None):
+        """
+        Returns the pks of the indexed objects built from the ``related_model``
+        object ``pk``, in a single query. With ``update_fields``, lookups that
+        only read other fields are left out.
+        """
+        lookups = []
+
+        for lookup, model_fields in self.get_related_dependencies().get(related_model, []):
+            if update_fields is None or model_fields is None or model_fields & set(update_fields):
+                lookups.append(lookup)
+
+        if not lookups:
+            return []
+
+        condition = reduce(operator.or_, [DQ(**{lookup: pk}) for lookup in lookups])
+        return list(self.get_model()._default_manager.filter(condition).values_list('pk', flat=True).distinct())
+
+    def get_related_updates(self, related_model, instance, update_fields=None, limit=None):
+        """
+        Returns the pks of the indexed objects to reindex after ``instance``,
+        a saved object of ``related_model``, changed. Empty (with a warning)
+        when there are more than ``limit`` (``max_related_updates`` by
+        default) of them.
+        """
+        pks = self.get_dependent_pks(related_model, instance.pk, update_fields=update_fields)
+
+        if limit is None:
+            limit = self.max_related_updates
+
+        if limit is not None and len(pks) > limit:
+            logging.getLogger('sanjab').warning(
+                "Not reindexing the %d %s objects depending on %r on save, as more than %d do. "
+                "Run update_index to refresh them.", len(pks), self.__class__.__name__, instance, limit)
+            return []
+
+        return pks
+
+    def update_related(self, related_model, instance, doc_type, using=None, update_fields=None):
+        """
+        Reindexes the objects whose documents are built from ``instance``, a
+        saved object of ``related_model``, in batches. Attached to the
+        post-save hook of the related model.
+        """
+        pks = self.get_related_updates(related_model, instance, update_fields=update_fields)
+
+        if pks:
+            self.update_pks(doc_type, pks, using=using)
+
+    def update_pks(self, doc_type, pks, using=None):
+        """Reindexes the objects ``pks`` as ``doc_type``, in batches."""
+        backend = self._get_backend(using)
+
+        if backend is None:
+            return
+
+        qs = self.build_queryset(using=using)
+
+        for start in range(0, len(pks), backend.batch_size):
+            backend.update(self, doc_type, qs.filter(pk__in=pks[start:start + backend.batch_size]))
+
+    def get_prepare_plan(self):
+        """
+        Returns the index's prepare plan, compiled on first use.
+
+        The plan is a ``PreparePlan`` listing, per field, the key it's stored
+        under & the callable producing its value (the ``prepare_<field>``
+        method if the index defines one, ``field.prepare`` otherwise), along
+        with the facet-copy & null-stripping rules ``full_prepare`` applies.
+        """
+        plan = getattr(self, '_prepare_plan', None)
+
+        if plan is None:
+            steps = []
+            facet_copies = []
+            nullable = []
+
+            for field_name, field in self.fields.items():
+                # Use the possibly overridden name, which will default to the
+                # variable name of the field.
+                preparer = getattr(self, "prepare_%s" % field_name, None) or field.prepare
+                steps.append((field.index_fieldname, preparer))
+
+                if getattr(field, 'facet_for', None):
+                    source_field_name = self.fields[field.facet_for].index_fieldname
+                    facet_copies.append((field.index_fieldname, source_field_name))
+
+                if field.null is True:
+                    nullable.append(field.index_fieldname)
+
+            plan = self._prepare_plan = PreparePlan(steps, facet_copies, nullable)
+
+        return plan
 
     def prepare(self, obj):
         """
@@ -200,36 +514,230 @@ class SearchIndex(with_metaclass(DeclarativeMetaclass, threading.local)):
             DJANGO_ID: force_text(obj.pk),
         }
 
-        for field_name, field in self.fields.items():
-            # Use the possibly overridden name, which will default to the
-            # variable name of the field.
-            self.prepared_data[field.index_fieldname] = field.prepare(obj)
-
-            if hasattr(self, "prepare_%s" % field_name):
-                value = getattr(self, "prepare_%s" % field_name)(obj)
-                self.prepared_data[field.index_fieldname] = value
+        for index_fieldname, preparer in self.get_prepare_plan().steps:
+            self.prepared_data[index_fieldname] = preparer(obj)
 
         return self.prepared_data
 
     def full_prepare(self, obj):
         self.prepared_data = self.prepare(obj)
+        return self.apply_prepare_rules(self.prepared_data)
+
+    def apply_prepare_rules(self, data):
+        """
+        Applies the facet-copy & null-stripping rules of the prepare plan to
+        a prepared document, in place.
+        """
+        plan = self.get_prepare_plan()
+
+        # Duplicate data for faceted fields. If there's data there, leave it
+        # alone. Otherwise, populate it with whatever the related field has.
+        for index_fieldname, source_field_name in plan.facet_copies:
+            if data.get(index_fieldname) is None and source_field_name in data:
+                data[index_fieldname] = data[source_field_name]
+
+        # Remove any fields that lack a value and are ``null=True``.
+        for index_fieldname in plan.nullable:
+            if index_fieldname in data and data[index_fieldname] is None:
+                del(data[index_fieldname])
+
+        return data
+
+    def get_field_dependencies(self):
+        """
+        Returns ``{field_name: model_fields}``: the model fields each index
+        field is prepared from, or ``None`` where that's unknown.
+
+        Dependencies come from the first step of ``model_attr``, from
+        ``prepare_<field>`` methods decorated with ``depends_on`` & from the
+        ``depends_on`` of templated fields, e.g.
+        ``CharField(use_template=True, depends_on=('title', 'body'))``.
+        Templated fields without it & undecorated ``prepare_<field>`` methods
+        are unknown. Facet fields follow the field they're a facet for.
+        """
+        dependencies = {}
 
         for field_name, field in self.fields.items():
-            # Duplicate data for faceted fields.
-            if getattr(field, 'facet_for', None):
-                source_field_name = self.fields[field.facet_for].index_fieldname
+            preparer = getattr(self, "prepare_%s" % field_name, None)
+
+            if preparer is not None:
+                dependencies[field_name] = self._concrete_field_names(getattr(preparer, 'depends_on', None))
+            elif field.use_template:
+                dependencies[field_name] = self._concrete_field_names(field.depends_on)
+            elif field.model_attr_path:
+                dependencies[field_name] = self._concrete_field_names(field.model_attr_path[:1])
+            else:
+                dependencies[field_name] = frozenset()
 
-                # If there's data there, leave it alone. Otherwise, populate it
-                # with whatever the related field has.
-                if self.prepared_data[field_name] is None and source_field_name in self.prepared_data:
-                    self.prepared_data[field.index_fieldname] = self.prepared_data[source_field_name]
+        for field_name, field in self.fields.items():
+            facet_for = getattr(field, 'facet_for', None)
 
-            # Remove any fields that lack a value and are ``null=True``.
-            if field.null is True:
-                if self.prepared_data[field.index_fieldname] is None:
-                    del(self.prepared_data[field.index_fieldname])
+            if facet_for and not field.model_attr_path and getattr(self, "prepare_%s" % field_name, None) is None:
+                dependencies[field_name] = dependencies.get(facet_for)
 
-        return self.prepared_data
+        return dependencies
+
+    def _concrete_field_names(self, names):
+        """
+        Maps model field names or attnames (``author_id``) onto the names of
+        the concrete fields they stand for. Returns ``None`` if any isn't one
+        (a property, a method, a many-to-many or reverse relation), as what it
+        reads can't be told from ``update_fields``.
+        """
+        if names is None:
+            return None
+
+        opts = self.get_model()._meta
+        attnames = dict((field.attname, field.name) for field in opts.fields)
+        field_names = set(attnames.values())
+        concrete = set()
+
+        for name in names:
+            name = attnames.get(name, name)
+
+            if name not in field_names:
+                return None
+
+            concrete.add(name)
+
+        return frozenset(concrete)
+
+    def get_fields_for_update(self, update_fields):
+        """
+        Returns the names of the index fields affected by saving the model
+        fields ``update_fields``, or ``None`` when a whole-document update is
+        needed (an affected field's dependencies are unknown).
+        """
+        update_fields = self._concrete_field_names(update_fields)
+
+        if update_fields is None:
+            return None
+
+        affected = []
+
+        for field_name, model_fields in self.get_field_dependencies().items():
+            if model_fields is None:
+                return None
+
+            if model_fields & update_fields:
+                affected.append(field_name)
+
+        return affected
+
+    def prepare_fields(self, obj, field_names):
+        """
+        Prepares only ``field_names`` for ``obj``, as a partial document keyed
+        by index field name. Facets are copied like in ``full_prepare``, but
+        ``None`` values are kept, so they clear the stored value.
+        """
+        data = {}
+
+        for field_name in field_names:
+            field = self.fields[field_name]
+            preparer = getattr(self, "prepare_%s" % field_name, None) or field.prepare
+            data[field.index_fieldname] = preparer(obj)
+
+        for index_fieldname, source_field_name in self.get_prepare_plan().facet_copies:
+            if index_fieldname in data and data[index_fieldname] is None and source_field_name in data:
+                data[index_fieldname] = data[source_field_name]
+
+        return data
+
+    def get_values_plan(self):
+        """
+        Returns a ``ValuesPlan`` if documents can be built straight from
+        ``values_list`` rows, skipping model instantiation, or ``None``.
+
+        That's the case when the index doesn't customize ``prepare``, has no
+        ``prepare_<field>`` methods or templated fields, and every
+        ``model_attr`` is a database column reached through single-valued
+        relations only.
+        """
+        plan = getattr(self, '_values_plan', False)
+
+        if plan is not False:
+            return plan
+
+        plan = self._values_plan = self._build_values_plan()
+        return plan
+
+    def _build_values_plan(self):
+        if not self.use_values_path or get_identifier is not default_get_identifier:
+            return None
+
+        for method in ('prepare', 'full_prepare'):
+            if _func(getattr(type(self), method)) is not _func(getattr(SearchIndex, method)):
+                return None
+
+        model = self.get_model()
+        columns = ['pk']
+        steps = []
+
+        for field_name, field in self.fields.items():
+            if field.use_template or getattr(self, "prepare_%s" % field_name, None) is not None:
+                return None
+
+            if isinstance(field, (LocationField, NestedField)):
+                return None
+
+            if not field.model_attr_path:
+                # Only a default (or a facet filled in from its source).
+                steps.append((field.index_fieldname, field, None))
+                continue
+
+            current = model
+
+            for position, attr in enumerate(field.model_attr_path):
+                found = get_model_field(current, attr)
+
+                if found is None or found[2]:
+                    return None
+
+                is_last = position == len(field.model_attr_path) - 1
+
+                if (found[1] is None) != is_last:
+                    # Ended on a relation, or went through a plain field.
+                    return None
+
+                current = found[1]
+
+            steps.append((field.index_fieldname, field, len(columns)))
+            columns.append(field.model_attr)
+
+        return ValuesPlan(columns, steps)
+
+    def prepare_rows(self, queryset):
+        """
+        Yields fully prepared documents for ``queryset`` using its
+        ``values_list`` rows. Requires ``get_values_plan`` to return a plan.
+        """
+        plan = self.get_values_plan()
+        model_ct = get_model_ct(self.get_model())
+
+        for row in queryset.values_list(*plan.columns):
+            pk = row[0]
+            data = {
+                ID: "%s.%s" % (model_ct, pk),
+                DJANGO_CT: model_ct,
+                DJANGO_ID: force_text(pk),
+            }
+
+            for index_fieldname, field, position in plan.steps:
+                if position is None:
+                    data[index_fieldname] = field.prepare(None)
+                    continue
+
+                value = row[position]
+
+                if value is None:
+                    if field.has_default():
+                        value = field.default
+                    elif not field.null:
+                        raise SearchFieldError("The object '%s.%s' has an empty model_attr '%s' and doesn't allow a default or null value." % (model_ct, pk, field.model_attr))
+
+                data[index_fieldname] = field.convert(value)
+
+            yield self.apply_prepare_rules(data)
 
     def get_content_field(self):
         """Returns the field that supplies the primary document to be indexed."""
@@ -281,12 +789,46 @@ class SearchIndex(with_metaclass(DeclarativeMetaclass, threading.local)):
             index = kwargs.pop('index')
         else:
             index = None
+        update_fields = kwargs.get('update_fields')
+        # Documents already prepared for other connections, keyed by doc type
+        # (see ``BaseSignalProcessor.handle_save``).
+        prepared = kwargs.get('prepared')
+
         # Check to make sure we want to index this first.
         if self.should_update(instance):
             backend = self._get_backend(using)
 
-            if backend is not None:
+            if backend is None:
+                return
+
+            if update_fields is not None and hasattr(backend, 'partial_update'):
+                fields = self.get_fields_for_update(update_fields)
+
+                if fields is not None:
+                    if not fields:
+                        # Nothing indexed changed.
+                        return
+
+                    if prepared is None:
+                        data = self.prepare_fields(instance, fields)
+                    else:
+                        if ('partial', doc_type) not in prepared:
+                            prepared[('partial', doc_type)] = self.prepare_fields(instance, fields)
+
+                        data = prepared[('partial', doc_type)]
+
+                    if backend.partial_update(doc_type, instance, data):
+                        return
+
+            if prepared is None or not hasattr(backend, 'bulk_update'):
                 backend.update(self, doc_type, [instance])
+                return
+
+            if ('full', doc_type) not in prepared:
+                prepared[('full', doc_type)] = backend.prepare_documents(self, [instance])
+
+            # Backends add their own keys to the documents they send.
+            backend.bulk_update(doc_type, [dict(doc) for doc in prepared[('full', doc_type)]])
 
     def should_update(self, instance):
         """
@@ -0,0 +1,162 @@
+# encoding: utf-8
+from __future__ import absolute_import, print_function, unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import CommandError, LabelCommand
+from django.db import reset_queries
+
+from sanjab import connections as sanjab_connections
+from sanjab.exceptions import NotHandled
+from sanjab.utils.app_loading import get_models, load_apps
+from sanjab.utils.consistency import db_bucket_stats, get_updated_index_field, has_integer_pk, to_millis
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+
+
+DEFAULT_BUCKET_SIZE = 1000
+# Elasticsearch sums into doubles, exact up to 2 ** 53: enough for 2000
+# timestamps in milliseconds up to the year 2112.
+MAX_BUCKET_SIZE = 2000
+
+
+class Command(LabelCommand):
+    help = "Checks the index against the database & repairs the documents that drifted."
+    base_options = (
+        make_option("-u", "--using", action="append", dest="using",
+            default=[],
+            help='Check only the named backend (can be used multiple times). '
+                 'By default all backends will be checked.'
+        ),
+        make_option("-d", "--doctype", action="store", dest="doctype",
+            default=None,
+            help='Check only the given Document type in index. '
+                 'By default all doctypes in the index will be checked.'
+        ),
+        make_option('--bucket-size', action='store', dest='bucket_size',
+            default=DEFAULT_BUCKET_SIZE, type='int',
+            help='Number of consecutive pks compared at once (at most %d).' % MAX_BUCKET_SIZE
+        ),
+        make_option('--dry-run', action='store_true', dest='dry_run',
+            default=False,
+            help='Report the documents that drifted without repairing them.'
+        ),
+    )
+    option_list = LabelCommand.option_list + base_options
+
+    def handle(self, *items, **options):
+        self.verbosity = int(options.get('verbosity', 1))
+        self.doctype = options.get('doctype')
+        self.bucket_size = max(int(options.get('bucket_size', DEFAULT_BUCKET_SIZE)), 1)
+
+        if self.bucket_size > MAX_BUCKET_SIZE:
+            raise CommandError("--bucket-size can't exceed %d, or the index's sums lose precision & "
+                               "every bucket looks different." % MAX_BUCKET_SIZE)
+        self.dry_run = options.get('dry_run', False)
+
+        self.backends = options.get('using')
+        if not self.backends:
+            self.backends = sanjab_connections.connections_info.keys()
+
+        if not items:
+            items = load_apps()
+
+        return super(Command, self).handle(*items, **options)
+
+    def handle_label(self, label, **options):
+        for using in self.backends:
+            backend = sanjab_connections[using].get_backend()
+
+            if not hasattr(backend, 'get_bucket_stats'):
+                if self.verbosity >= 1:
+                    print("Skipping '%s' - its backend can't be checked." % using)
+                continue
+
+            if not backend.setup_complete:
+                backend.setup()
+
+            unified_index = sanjab_connections[using].get_unified_index()
+
+            for model in get_models(label):
+                try:
+                    indexes = dict(unified_index.get_index(model))
+                except NotHandled:
+                    continue
+
+                indexes.pop('base', None)
+
+                if not has_integer_pk(model):
+                    if self.verbosity >= 1:
+                        print("Skipping '%s' - only integer pks can be checked." % model)
+                    continue
+
+                for type, index in indexes.items():
+                    if self.doctype and type != self.doctype:
+                        continue
+
+                    self.check(backend, index, type, model, using)
+
+    def check(self, backend, index, type, model, using):
+        """
+        Compares per-bucket aggregates of the database & the index, then
+        drills into the buckets that differ & repairs their documents.
+        """
+        updated_fieldname = get_updated_index_field(index)
+        updated_field = index.get_updated_field() if updated_fieldname else None
+        qs = index.index_queryset(using=using)
+        name = force_text(model._meta.verbose_name_plural)
+
+        db_stats = db_bucket_stats(qs, self.bucket_size, updated_field)
+        index_stats = backend.get_bucket_stats(type, self.bucket_size, updated_fieldname)
+        mismatched = sorted(bucket for bucket in set(db_stats) | set(index_stats)
+                            if db_stats.get(bucket) != index_stats.get(bucket))
+        reset_queries()
+
+        if self.verbosity >= 1:
+            print(u"Checked %d buckets of %s (%s): %d differ" % (len(set(db_stats) | set(index_stats)), name, type, len(mismatched)))
+
+            if updated_fieldname is None and self.verbosity >= 2:
+                print(u"  no indexed updated field, so only missing & extra documents are detected.")
+
+        to_index = []
+        to_remove = []
+
+        for bucket in mismatched:
+            start, end = bucket * self.bucket_size, (bucket + 1) * self.bucket_size
+            columns = ['pk'] + ([updated_field] if updated_field else [])
+            rows = dict((row[0], row[1] if updated_field else None)
+                        for row in qs.filter(pk__gte=start, pk__lt=end).order_by().values_list(*columns))
+            docs = backend.get_bucket_documents(type, start, end, updated_fieldname)
+            stale = [pk for pk, updated in rows.items()
+                     if pk not in docs or (updated_field and to_millis(updated) != docs[pk][1])]
+            extra = [doc_id for pk, (doc_id, updated) in docs.items() if pk not in rows]
+
+            if self.verbosity >= 2:
+                print(u"  pks %d - %d: %d to index, %d to remove." % (start, end - 1, len(stale), len(extra)))
+
+            to_index.extend(stale)
+            to_remove.extend(extra)
+            reset_queries()
+
+        if self.verbosity >= 1 and mismatched:
+            print(u"%s %d %s & %s %d documents" % ("Would index" if self.dry_run else "Indexing", len(to_index), name,
+                                                 "would remove" if self.dry_run else "removing", len(to_remove)))
+
+        if self.dry_run:
+            return
+
+        build_qs = index.build_queryset(using=using)
+        batch_size = backend.batch_size
+
+        for start in range(0, len(to_index), batch_size):
+            backend.update(index, type, build_qs.filter(pk__in=to_index[start:start + batch_size]), commit=False)
+            reset_queries()
+
+        for start in range(0, len(to_remove), batch_size):
+            backend.bulk_remove(type, to_remove[start:start + batch_size], commit=False)
+
+        if to_index or to_remove:
+            backend.refresh()
@@ -0,0 +1,42 @@
+from __future__ import print_function
+from __future__ import unicode_literals
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Replays the index operations spooled while the search engine was unavailable."
+    base_options = (
+        make_option("-u", "--using", action="append", dest="using",
+            default=[],
+            help='Drain only the named backend (can be used multiple times). '
+                 'By default all backends with a SPOOL_PATH will be drained.'
+        ),
+    )
+    option_list = BaseCommand.option_list + base_options
+
+    def handle(self, **options):
+        from sanjab import connections
+        self.verbosity = int(options.get('verbosity', 1))
+
+        using = options.get('using')
+        if not using:
+            using = connections.connections_info.keys()
+
+        for backend_name in using:
+            backend = connections[backend_name].get_backend()
+            spool = getattr(backend, 'get_spool', lambda: None)()
+
+            if spool is None:
+                if options.get('using'):
+                    raise CommandError("The '%s' connection has no 'SPOOL_PATH'." % backend_name)
+                continue
+
+            if not backend.is_healthy():
+                raise CommandError("The '%s' connection is still unavailable." % backend_name)
+
+            replayed = spool.drain(backend.replay_spooled)
+
+            if self.verbosity >= 1:
+                print("Replayed %d spooled operations for '%s'." % (replayed, backend_name))
@@ -0,0 +1,126 @@
+from __future__ import print_function
+from __future__ import unicode_literals
+import threading
+from multiprocessing.pool import ThreadPool
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sanjab.constants import DEFAULT_ALIAS
+from sanjab.utils.dump import read_actions
+
+
+class Command(BaseCommand):
+    help = "Loads documents dumped by `update_index --dump` into the index."
+    args = "<path path ...>"
+    base_options = (
+        make_option("-u", "--using", action="store", dest="using",
+            default=DEFAULT_ALIAS,
+            help='The backend to load the documents into.'
+        ),
+        make_option('-k', '--workers', action='store', dest='workers',
+            default=4, type='int',
+            help='Number of bulk requests sent in parallel.'
+        ),
+    )
+    option_list = BaseCommand.option_list + base_options
+
+    def handle(self, *paths, **options):
+        from sanjab import connections
+        self.verbosity = int(options.get('verbosity', 1))
+
+        if not paths:
+            raise CommandError("Give the path of at least one dump to load.")
+
+        backend = connections[options.get('using')].get_backend()
+
+        if not hasattr(backend, 'get_bulk_sender'):
+            raise CommandError("The '%s' backend can't load dumps." % options.get('using'))
+
+        if not backend.setup_complete:
+            backend.setup()
+
+        failed = 0
+
+        for path in paths:
+            failed += self.load(backend, path, max(options.get('workers', 4), 1))
+
+        backend.refresh()
+
+        if failed:
+            raise CommandError("%d documents failed to load." % failed)
+
+    def load(self, backend, path, workers):
+        """
+        Streams the actions of ``path`` to the backend in chunks of about the
+        bulk sender's maximum size, ``workers`` at a time. At most twice as
+        many chunks are read ahead, so memory stays constant.
+
+        Reports each document that failed & returns how many did.
+        """
+        sender = backend.get_bulk_sender()
+        pool = ThreadPool(workers)
+        slots = threading.BoundedSemaphore(workers * 2)
+        stats = {'loaded': 0, 'failed': 0}
+        errors = []
+        lock = threading.Lock()
+
+        def send(chunk):
+            # ``apply_async`` has no error callback on Python 2.
+            try:
+                return sender.send_encoded(chunk)
+            except Exception as e:
+                errors.append(e)
+                return [], [], []
+
+        def done(result):
+            loaded, failed, rejected = result
+
+            with lock:
+                stats['loaded'] += len(loaded)
+                stats['failed'] += len(failed) + len(rejected)
+
+                for (doc_type, doc_id), error in failed:
+                    self.stderr.write("  failed to load %s %s: %s" % (doc_type, doc_id, error))
+
+                for doc_type, doc_id in rejected:
+                    self.stderr.write("  failed to load %s %s: still rejected after retrying" % (doc_type, doc_id))
+
+                if self.verbosity >= 2:
+                    print("  loaded %d documents." % stats['loaded'])
+
+            slots.release()
+
+        def submit(chunk):
+            slots.acquire()
+
+            if errors:
+                slots.release()
+                raise errors[0]
+
+            pool.apply_async(send, (chunk,), callback=done)
+
+        chunk, size = [], 0
+
+        try:
+            for key, lines in read_actions(path):
+                chunk.append((key, lines))
+                size += len(lines)
+
+                if size >= sender.max_bytes:
+                    submit(chunk)
+                    chunk, size = [], 0
+
+            if chunk:
+                submit(chunk)
+        finally:
+            pool.close()
+            pool.join()
+
+        if errors:
+            raise errors[0]
+
+        if self.verbosity >= 1:
+            print("Loaded %d documents from %s (%d failed)." % (stats['loaded'], path, stats['failed']))
+
+        return stats['failed']
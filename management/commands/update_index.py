@@ -1,18 +1,24 @@
 # encoding: utf-8
 from __future__ import absolute_import, print_function, unicode_literals
 
+import collections
 import logging
 import os
 from datetime import timedelta, datetime
 from optparse import make_option
 
 from django import db
-from django.core.management.base import LabelCommand
+from django.core.management.base import CommandError, LabelCommand
 from django.db import reset_queries
+from django.db.models.sql.datastructures import EmptyResultSet
 
 from sanjab import connections as sanjab_connections
 from sanjab.query import SearchQuerySet
+from sanjab.utils import get_identifier
 from sanjab.utils.app_loading import get_models, load_apps
+from sanjab.utils.dump import DumpWriter
+from sanjab.utils.fanout import FanOutWriter
+from sanjab.utils.pipeline import PipelinedIndexer
 
 try:
     from django.utils.encoding import force_text
@@ -37,7 +43,7 @@ APP = 'app'
 MODEL = 'model'
 
 
-def worker(bits):
+def reset_connections():
     # We need to reset the connections, otherwise the different processes
     # will try to share the connection, which causes things to blow up.
     from django.db import connections
@@ -55,25 +61,47 @@ def worker(bits):
             except KeyError:
                 pass
 
+    # Likewise, the Elasticsearch clients' pooled sockets were inherited from
+    # the parent process & must not be shared.
+    try:
+        from sanjab.elasticsearch.connections import connections as es_connections
+        es_connections.reset()
+    except ImportError:
+        pass
+
+
+def worker(bits):
+    reset_connections()
+
     if bits[0] == 'do_update':
         func, model, start, end, total, using, start_date, end_date, verbosity = bits
+    elif bits[0] == 'do_update_many':
+        func, model, types, start, end, total, using, start_date, end_date, verbosity = bits
     elif bits[0] == 'do_remove':
         func, model, pks_seen, start, upper_bound, using, verbosity = bits
     else:
         return
 
     unified_index = sanjab_connections[using].get_unified_index()
-    indexes = unified_index.get_index(model)
+    indexes = dict(unified_index.get_index(model))
     backend = sanjab_connections[using].get_backend()
 
+    skipped = 0
+
     if func == 'do_update':
         for type, index in indexes.items():
             qs = index.build_queryset(using=using, start_date=start_date,
                                       end_date=end_date)
-            do_update(backend, index, type, qs, start, end, total, verbosity=verbosity)
+            skipped += do_update(backend, index, type, qs, start, end, total, verbosity=verbosity)
+    elif func == 'do_update_many':
+        indexes = [(type, indexes[type]) for type in types]
+        qs = indexes[0][1].build_queryset(using=using, start_date=start_date, end_date=end_date)
+        skipped += do_update_many(backend, indexes, qs, start, end, total, verbosity=verbosity)
     elif bits[0] == 'do_remove':
         do_remove(backend, None, model, pks_seen, start, upper_bound, verbosity=verbosity)
 
+    return skipped
+
 
 def do_update(backend, index, type, qs, start, end, total, verbosity=1):
     # Get a clone of the QuerySet so that the cache doesn't bloat up
@@ -86,12 +114,68 @@ def do_update(backend, index, type, qs, start, end, total, verbosity=1):
         else:
             print("  indexed %s - %d of %d (by %s)." % (start + 1, end, total, os.getpid()))
 
-    # FIXME: Get the right backend.
-    backend.update(index, type, current_qs)
+    if index.get_values_plan() is not None and hasattr(backend, 'bulk_update'):
+        # Build the documents straight from the rows, without instantiating
+        # the models.
+        docs = [backend.finalize_document(data) for data in index.prepare_rows(current_qs)]
+        result = backend.bulk_update(type, docs)
+    else:
+        # FIXME: Get the right backend.
+        result = backend.update(index, type, current_qs)
 
     # Clear out the DB connections queries because it bloats up RAM.
     reset_queries()
 
+    # Backends skipping unchanged documents report how many they skipped.
+    return len(getattr(result, 'skipped', None) or [])
+
+
+def do_update_many(backend, indexes, qs, start, end, total, verbosity=1):
+    """
+    Indexes one batch of ``qs`` for several doc types at once: the objects
+    are fetched once, prepared by each of the ``(type, index)`` pairs of
+    ``indexes`` & sent together in a single bulk request when the backend
+    supports it.
+    """
+    objs = list(qs.all()[start:end])
+
+    if verbosity >= 2:
+        print("  indexed %s - %d of %d (%s)." % (start + 1, end, total, ", ".join(type for type, index in indexes)))
+
+    if hasattr(backend, 'bulk_update_many'):
+        docs_by_type = [(type, backend.prepare_documents(index, objs)) for type, index in indexes]
+        results = [backend.bulk_update_many(docs_by_type)]
+    else:
+        results = [backend.update(index, type, objs) for type, index in indexes]
+
+    reset_queries()
+    return sum(len(getattr(result, 'skipped', None) or []) for result in results)
+
+
+def group_by_queryset(indexes, using, start_date=None, end_date=None):
+    """
+    Groups the ``{type: index}`` of a model by the queryset they index, so
+    doc types built from the same rows can share a single database pass.
+
+    Returns a list of ``([(type, index), ...], qs)`` pairs.
+    """
+    groups = collections.OrderedDict()
+
+    for type, index in sorted(indexes.items()):
+        qs = index.build_queryset(using=using, start_date=start_date, end_date=end_date)
+
+        try:
+            key = (qs.model, qs.db, force_text(qs.query))
+        except EmptyResultSet:
+            key = type
+
+        if key in groups:
+            groups[key][0].append((type, index))
+        else:
+            groups[key] = ([(type, index)], qs)
+
+    return list(groups.values())
+
 
 def do_remove(backend, index, model, pks_seen, start, upper_bound, verbosity=1):
     # Fetch a list of results.
@@ -146,6 +230,38 @@ class Command(LabelCommand):
             default=0, type='int',
             help='Allows for the use multiple workers to parallelize indexing. Requires multiprocessing.'
         ),
+        make_option('--single-pass', action='store_true', dest='single_pass',
+            default=False,
+            help='Index the doc types of a model that share a queryset from a single pass over the database, sending their documents together.'
+        ),
+        make_option('--dump', action='store', dest='dump',
+            default=None,
+            help='Write the prepared documents as bulk actions to this file (gzipped if it ends with .gz) instead of indexing them. See load_index.'
+        ),
+        make_option('--fan-out', action='store_true', dest='fan_out',
+            default=False,
+            help='Prepare documents once & write them to all the --using backends concurrently.'
+        ),
+        make_option('--since-last', action='store_true', dest='since_last',
+            default=False,
+            help='Index only what changed since the last acknowledged batch of a previous --since-last run. Needs CHECKPOINT_PATH on the connection.'
+        ),
+        make_option('--pipeline', action='store_true', dest='pipeline',
+            default=False,
+            help='Overlap fetching, preparing & sending of batches. Ignored with --workers.'
+        ),
+        make_option('--prepare-workers', action='store', dest='prepare_workers',
+            default=1, type='int',
+            help='Number of threads preparing documents when pipelining.'
+        ),
+        make_option('--send-workers', action='store', dest='send_workers',
+            default=1, type='int',
+            help='Number of threads sending documents when pipelining.'
+        ),
+        make_option('--prepare-processes', action='store', dest='prepare_processes',
+            default=0, type='int',
+            help='Prepare documents in a pool of this many processes when pipelining.'
+        ),
     )
     option_list = LabelCommand.option_list + base_options
 
@@ -158,11 +274,36 @@ class Command(LabelCommand):
         self.doctype = None
         self.remove = options.get('remove', False)
         self.workers = int(options.get('workers', 0))
+        self.since_last = options.get('since_last', False)
+        self.single_pass = options.get('single_pass', False)
+        self.fan_out = options.get('fan_out', False)
+        self.dump = options.get('dump')
+        self.pipeline = options.get('pipeline', False)
+        self.prepare_workers = int(options.get('prepare_workers', 1))
+        self.send_workers = int(options.get('send_workers', 1))
+        self.prepare_processes = int(options.get('prepare_processes', 0))
 
         self.backends = options.get('using')
         if not self.backends:
             self.backends = sanjab_connections.connections_info.keys()
 
+        if self.since_last and (self.workers > 0 or self.pipeline):
+            # The checkpoint only moves forward batch after batch, in order.
+            raise CommandError("--since-last can't be combined with %s." % ('--workers' if self.workers > 0 else '--pipeline'))
+
+        if self.dump or (self.fan_out and len(self.backends) > 1):
+            # Both prepare every document once & stream it out, which none
+            # of these apply to.
+            conflicting = [flag for flag, given in (('--remove', self.remove),
+                                                    ('--workers', self.workers > 0),
+                                                    ('--since-last', self.since_last),
+                                                    ('--single-pass', self.single_pass),
+                                                    ('--pipeline', self.pipeline)) if given]
+
+            if conflicting:
+                raise CommandError("%s can't be combined with %s." % ('--dump' if self.dump else '--fan-out',
+                                                                     ', '.join(conflicting)))
+
         age = options.get('age', DEFAULT_AGE)
         start_date = options.get('start_date')
         end_date = options.get('end_date')
@@ -192,9 +333,39 @@ class Command(LabelCommand):
         if not items:
             items = load_apps()
 
+        if self.dump:
+            backend = sanjab_connections[self.backends[0]].get_backend()
+            transport = getattr(getattr(backend, 'conn', None), 'transport', None)
+
+            if transport is None:
+                raise CommandError("--dump needs an Elasticsearch backend, which '%s' isn't." % self.backends[0])
+
+            self.dump_writer = DumpWriter(self.dump, transport.serializer)
+
+            try:
+                return super(Command, self).handle(*items, **options)
+            finally:
+                self.dump_writer.close()
+
+                if self.verbosity >= 1:
+                    print(u"Dumped %d documents to %s" % (self.dump_writer.count, self.dump))
+
         return super(Command, self).handle(*items, **options)
 
     def handle_label(self, label, **options):
+        if self.dump:
+            self.update_prepared_once(label, dump_writer=self.dump_writer)
+            return
+
+        if self.fan_out and len(self.backends) > 1:
+            try:
+                self.update_prepared_once(label)
+            except:
+                logging.exception("Error updating %s using %s ", label, ", ".join(self.backends))
+                raise
+
+            return
+
         for using in self.backends:
             try:
                 self.update_backend(label, using)
@@ -202,6 +373,253 @@ class Command(LabelCommand):
                 logging.exception("Error updating %s using %s ", label, using)
                 raise
 
+    def update_prepared_once(self, label, dump_writer=None):
+        """
+        Prepares the documents of ``label`` with the indexes of the first
+        backend & writes them to all of them through a ``FanOutWriter``, or
+        to ``dump_writer`` (a ``DumpWriter``) if given.
+        """
+        from sanjab.exceptions import NotHandled
+        using = self.backends[0]
+        backend = sanjab_connections[using].get_backend()
+        backends = [sanjab_connections[alias].get_backend() for alias in self.backends]
+        unified_index = sanjab_connections[using].get_unified_index()
+
+        for model in get_models(label):
+            try:
+                indexes = dict(unified_index.get_index(model))
+            except NotHandled:
+                if self.verbosity >= 2:
+                    print("Skipping '%s' - no index." % model)
+                continue
+
+            indexes.pop('base', None)
+
+            if self.doctype:
+                if self.doctype not in indexes:
+                    continue
+                indexes = {self.doctype: indexes[self.doctype]}
+
+            for type, index in indexes.items():
+                qs = index.build_queryset(using=using, start_date=self.start_date,
+                                          end_date=self.end_date)
+                total = qs.count()
+                batch_size = self.batchsize or backend.batch_size
+                use_values = index.get_values_plan() is not None
+
+                if self.verbosity >= 1:
+                    print(u"Indexing %d %s to %s" % (total, force_text(model._meta.verbose_name_plural),
+                                                     self.dump if dump_writer else ", ".join(self.backends)))
+
+                writer = dump_writer or FanOutWriter(backends)
+
+                try:
+                    for start in range(0, total, batch_size):
+                        end = min(start + batch_size, total)
+                        current_qs = qs.all()[start:end]
+
+                        if use_values:
+                            docs = [backend.finalize_document(data) for data in index.prepare_rows(current_qs)]
+                        else:
+                            docs = backend.prepare_documents(index, current_qs)
+
+                        writer.send(type, docs)
+                        reset_queries()
+
+                        if self.verbosity >= 2:
+                            print("  prepared %s - %d of %d." % (start + 1, end, total))
+                finally:
+                    if dump_writer is None:
+                        writer.close()
+
+                if dump_writer is not None:
+                    continue
+
+                for alias, skipped in writer.skipped.items():
+                    if skipped and self.verbosity >= 1:
+                        print(u"Skipped %d unchanged %s on %s" % (skipped, force_text(model._meta.verbose_name_plural), alias))
+
+                dropped = [alias for alias, count in writer.dropped.items() if count]
+
+                if dropped:
+                    raise CommandError("%s fell behind & missed some %s; reindex them there without --fan-out." % (
+                        ", ".join(dropped), force_text(model._meta.verbose_name_plural)))
+
+    def update_pipelined(self, backend, index, type, qs, batch_size, total):
+        pool = None
+
+        if self.prepare_processes > 0:
+            import multiprocessing
+            db.close_connection()
+            pool = multiprocessing.Pool(self.prepare_processes, initializer=reset_connections)
+
+        try:
+            indexer = PipelinedIndexer(backend, index, type,
+                                       prepare_workers=self.prepare_workers,
+                                       send_workers=self.send_workers,
+                                       pool=pool, pool_size=self.prepare_processes,
+                                       verbosity=self.verbosity)
+            indexer.run(qs, batch_size, total=total)
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+        reset_queries()
+        return indexer.skipped
+
+    def update_since_last(self, backend, index, type, model, using):
+        """
+        Indexes the objects changed since the stored checkpoint, in
+        ``(updated, pk)`` order, moving the checkpoint forward after each
+        batch past the documents the backend acknowledged or can never take.
+        """
+        store = getattr(backend, 'get_checkpoint_store', lambda: None)()
+
+        if store is None:
+            raise CommandError("--since-last needs a 'CHECKPOINT_PATH' for the '%s' connection." % using)
+
+        prepare = getattr(backend, 'prepare_documents', None)
+        batch_size = self.batchsize or backend.batch_size
+        checkpoint = store.get(using, type)
+        total = index.build_incremental_queryset(using=using, since=checkpoint).count()
+        indexed = skipped = failed = 0
+
+        if self.verbosity >= 1:
+            print(u"Indexing %d %s changed since the last run" % (total, force_text(model._meta.verbose_name_plural)))
+
+        while True:
+            # Keyset pagination: each batch starts right after the checkpoint.
+            batch = list(index.build_incremental_queryset(using=using, since=checkpoint)[:batch_size])
+
+            if not batch:
+                break
+
+            prepared = None
+
+            if prepare is not None:
+                docs = prepare(index, batch)
+                prepared = set(doc['_id'] for doc in docs)
+                result = backend.bulk_update(type, docs, commit=False)
+            else:
+                result = backend.update(index, type, batch, commit=False)
+
+            skipped += len(getattr(result, 'skipped', None) or [])
+            # What the backend reports as indexed (or unchanged) counts, as do
+            # the documents it can never take (refused, or not prepared),
+            # which are logged & left behind. Anything else (turned away for
+            # now, no result or an empty one after a swallowed error) stops
+            # the checkpoint, to be retried next time.
+            sent = set(getattr(result, 'indexed', None) or []) | set(getattr(result, 'skipped', None) or [])
+            refused = dict(getattr(result, 'failed', None) or [])
+            acknowledged = None
+
+            for obj in batch:
+                identifier = get_identifier(obj)
+
+                if identifier in sent:
+                    indexed += 1
+                elif identifier in refused:
+                    logging.error("Skipping '%s', the backend refused it: %s", identifier, refused[identifier])
+                    failed += 1
+                elif prepared is not None and identifier not in prepared:
+                    logging.error("Skipping '%s', it couldn't be prepared.", identifier)
+                    failed += 1
+                else:
+                    break
+
+                acknowledged = obj
+
+            if acknowledged is not None:
+                checkpoint = index.get_checkpoint(acknowledged)
+                store.set(using, type, checkpoint)
+
+            if self.verbosity >= 2:
+                print("  indexed %d of %d." % (indexed, total))
+
+            reset_queries()
+
+            if acknowledged is not batch[-1]:
+                # Resume from the first transient failure next time.
+                logging.error("Indexing '%s' stopped at a document the backend didn't acknowledge; the checkpoint stays at %r.", type, checkpoint)
+                break
+
+        if hasattr(backend, 'refresh'):
+            backend.refresh()
+
+        if skipped and self.verbosity >= 1:
+            print(u"Skipped %d unchanged %s" % (skipped, force_text(model._meta.verbose_name_plural)))
+
+        if failed and self.verbosity >= 1:
+            print(u"Left behind %d %s that can't be indexed" % (failed, force_text(model._meta.verbose_name_plural)))
+
+    def update_single_pass(self, backend, model, indexes, qs, using):
+        """
+        Indexes the doc types of ``indexes`` (``(type, index)`` pairs sharing
+        the queryset ``qs``) batch by batch, fetching each batch once.
+        """
+        types = [type for type, index in indexes]
+        total = qs.count()
+        batch_size = self.batchsize or backend.batch_size
+        skipped = 0
+
+        if self.verbosity >= 1:
+            print(u"Indexing %d %s as %s" % (total, force_text(model._meta.verbose_name_plural), ", ".join(types)))
+
+        if self.workers > 0:
+            import multiprocessing
+            ghetto_queue = []
+
+        for start in range(0, total, batch_size):
+            end = min(start + batch_size, total)
+
+            if self.workers == 0:
+                skipped += do_update_many(backend, indexes, qs, start, end, total, self.verbosity)
+            else:
+                ghetto_queue.append(('do_update_many', model, types, start, end, total, using, self.start_date, self.end_date, self.verbosity))
+
+        if self.workers > 0:
+            pool = multiprocessing.Pool(self.workers)
+            skipped = sum(pool.map(worker, ghetto_queue))
+            pool.terminate()
+
+        if skipped and self.verbosity >= 1:
+            print(u"Skipped %d unchanged %s" % (skipped, force_text(model._meta.verbose_name_plural)))
+
+        if self.remove:
+            self.remove_stale(backend, indexes[0][1], model, qs, total, batch_size, using)
+
+    def remove_stale(self, backend, index, model, qs, total, batch_size, using):
+        """
+        Removes the documents of ``model`` whose objects are no longer in the
+        database.
+        """
+        if self.start_date or self.end_date or total <= 0:
+            # They're using a reduced set, which may not incorporate
+            # all pks. Rebuild the list with everything.
+            qs = index.index_queryset().values_list('pk', flat=True)
+            pks_seen = set(smart_bytes(pk) for pk in qs)
+
+            total = len(pks_seen)
+        else:
+            pks_seen = set(smart_bytes(pk) for pk in qs.values_list('pk', flat=True))
+
+        if self.workers > 0:
+            import multiprocessing
+            ghetto_queue = []
+
+        for start in range(0, total, batch_size):
+            upper_bound = start + batch_size
+
+            if self.workers == 0:
+                do_remove(backend, index, model, pks_seen, start, upper_bound)
+            else:
+                ghetto_queue.append(('do_remove', model, pks_seen, start, upper_bound, using, self.verbosity))
+
+        if self.workers > 0:
+            pool = multiprocessing.Pool(self.workers)
+            pool.map(worker, ghetto_queue)
+            pool.terminate()
+
     def update_backend(self, label, using):
         from sanjab.exceptions import NotHandled
         backend = sanjab_connections[using].get_backend()
@@ -211,7 +629,7 @@ class Command(LabelCommand):
 
         for model in get_models(label):
             try:
-                indexes = unified_index.get_index(model)
+                indexes = dict(unified_index.get_index(model))
             except NotHandled:
                 if self.verbosity >= 2:
                     print("Skipping '%s' - no index." % model)
@@ -232,7 +650,21 @@ class Command(LabelCommand):
                 indexes = {self.doctype: indexes[self.doctype]}
                 print(u"Updating given doctype indexes: %s" % self.doctype)
 
+            if self.single_pass and not self.since_last:
+                indexes = dict(indexes)
+
+                for group, qs in group_by_queryset(indexes, using, self.start_date, self.end_date):
+                    if len(group) > 1:
+                        self.update_single_pass(backend, model, group, qs, using)
+
+                        for type, index in group:
+                            del indexes[type]
+
             for type, index in indexes.items():
+                if self.since_last:
+                    self.update_since_last(backend, index, type, model, using)
+                    continue
+
                 qs = index.build_queryset(using=using, start_date=self.start_date,
                                           end_date=self.end_date)
 
@@ -246,45 +678,29 @@ class Command(LabelCommand):
                 if self.workers > 0:
                     ghetto_queue = []
 
-                for start in range(0, total, batch_size):
-                    end = min(start + batch_size, total)
+                skipped = 0
+
+                if self.pipeline and self.workers == 0 and hasattr(backend, 'bulk_update'):
+                    skipped = self.update_pipelined(backend, index, type, qs, batch_size, total)
+                else:
+                    for start in range(0, total, batch_size):
+                        end = min(start + batch_size, total)
 
-                    if self.workers == 0:
-                        do_update(backend, index, type, qs, start, end, total, self.verbosity)
-                    else:
-                        ghetto_queue.append(('do_update', model, start, end, total, using, self.start_date, self.end_date, self.verbosity))
+                        if self.workers == 0:
+                            skipped += do_update(backend, index, type, qs, start, end, total, self.verbosity)
+                        else:
+                            ghetto_queue.append(('do_update', model, start, end, total, using, self.start_date, self.end_date, self.verbosity))
 
                 if self.workers > 0:
                     pool = multiprocessing.Pool(self.workers)
-                    pool.map(worker, ghetto_queue)
+                    skipped = sum(pool.map(worker, ghetto_queue))
                     pool.terminate()
 
-                if self.remove:
-                    if self.start_date or self.end_date or total <= 0:
-                        # They're using a reduced set, which may not incorporate
-                        # all pks. Rebuild the list with everything.
-                        qs = index.index_queryset().values_list('pk', flat=True)
-                        pks_seen = set(smart_bytes(pk) for pk in qs)
-
-                        total = len(pks_seen)
-                    else:
-                        pks_seen = set(smart_bytes(pk) for pk in qs.values_list('pk', flat=True))
-
-                    if self.workers > 0:
-                        ghetto_queue = []
-
-                    for start in range(0, total, batch_size):
-                        upper_bound = start + batch_size
-
-                        if self.workers == 0:
-                            do_remove(backend, index, model, pks_seen, start, upper_bound)
-                        else:
-                            ghetto_queue.append(('do_remove', model, pks_seen, start, upper_bound, using, self.verbosity))
+                if skipped and self.verbosity >= 1:
+                    print(u"Skipped %d unchanged %s" % (skipped, force_text(model._meta.verbose_name_plural)))
 
-                    if self.workers > 0:
-                        pool = multiprocessing.Pool(self.workers)
-                        pool.map(worker, ghetto_queue)
-                        pool.terminate()
+                if self.remove:
+                    self.remove_stale(backend, index, model, qs, total, batch_size, using)
             delta = (datetime.now() - self.start_time).total_seconds()
 
             print ("Completed in %s seconds or %s minutes" % (delta, delta/60))
\ No newline at end of file
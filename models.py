@@ -27,9 +27,9 @@ class SearchResult(object):
     A single search result. The actual object is loaded lazily by accessing
     object; until then this object only stores the model, pk, and score.
 
-    Note that iterating over SearchResults and getting the object for each
-    result will do O(N) database queries, which may not fit your needs for
-    performance.
+    Results fetched through a ``SearchQuerySet`` share a ``BatchLoader``, so
+    the first access to ``object`` loads the objects of every result of the
+    same model & doc type on the page with a single query.
     """
     def __init__(self, app_label, model_name, pk, score, doc_type, **kwargs):
         self.app_label, self.model_name = app_label, model_name
@@ -37,6 +37,7 @@ class SearchResult(object):
         self.score = score
         self.doc_type = doc_type
         self._object = None
+        self._loader = None
         self._model = None
         self._verbose_name = None
         self._additional_fields = ['pk']
@@ -67,7 +68,8 @@ class SearchResult(object):
 
     def _get_searchindex(self):
         from sanjab import connections
-        return connections['default'].get_unified_index().get_index(self.model)
+        index = connections['default'].get_unified_index().get_index(self.model)
+        return index.get(self.doc_type) or index.get('base')
 
     searchindex = property(_get_searchindex)
 
@@ -77,6 +79,14 @@ class SearchResult(object):
                 self.log.error("Model could not be found for SearchResult '%s'.", self)
                 return None
 
+            if self._loader is not None:
+                self._loader.load(self)
+
+                if self._object is None:
+                    self.log.error("Object could not be found in database for SearchResult '%s'.", self)
+
+                return self._object
+
             try:
                 try:
                     self._object = self.searchindex.read_queryset().get(pk=self.pk)
@@ -218,6 +228,8 @@ class SearchResult(object):
         # ``threading.Lock``, which doesn't pickle well.
         ret_dict = self.__dict__.copy()
         del(ret_dict['log'])
+        # The loader references the whole page of results.
+        ret_dict['_loader'] = None
         return ret_dict
 
     def __setstate__(self, data_dict):
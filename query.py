@@ -8,6 +8,7 @@ from sanjab.constants import REPR_OUTPUT_SIZE, ITERATOR_LOAD_PER_QUERY, DEFAULT_
 from sanjab.exceptions import NotHandled
 from sanjab.inputs import Raw, Clean, AutoQuery
 from sanjab.utils import log as logging
+from sanjab.utils.hydration import BatchLoader, attach_stored_objects, load_objects
 
 
 class SearchQuerySet(object):
@@ -27,6 +28,7 @@ class SearchQuerySet(object):
         self._result_count = None
         self._cache_full = False
         self._load_all = False
+        self._load_stored = False
         self._ignored_result_count = 0
         self.log = logging.getLogger('sanjab')
 
@@ -205,36 +207,15 @@ class SearchQuerySet(object):
 
         # Check if we wish to load all objects.
         if self._load_all:
-            result_indexes = {}
             models_doc_pks = {}
-            loaded_objects = {}
 
-            """
-            "Airline":{
-                "AirlineAll": {pk1, pk2, ...}
-            }
-            """
-            # Remember the search position for each result so we don't have to resort later.
+            # Group the pks by model & doc type, e.g.
+            # {Airline: {'AirlineAll': [pk1, pk2, ...]}}
             for result in results:
                 models_doc_pks.setdefault(result.model, {})
                 models_doc_pks[result.model].setdefault(result.doc_type, []).append(result.pk)
 
-            # Load the objects for each model in turn.
-            for model, modelResults in models_doc_pks.iteritems():
-                ui = connections[self.query._using].get_unified_index()
-                index = ui.get_index(model)
-                loaded_objects[model] = {}
-                for doc_type, doc_pks in modelResults.iteritems():
-                    model_index = index.get(doc_type, None)
-                    if not model_index:
-                        self.log.warning("IndexModel was not found for type: %s", doc_type)
-                    objects = model_index.read_queryset(using=self.query._using)
-                    try:
-                        loaded_objects[model].update(objects.in_bulk(doc_pks))
-                    except NotHandled:
-                        self.log.warning("Model '%s' not handled by the routers", model)
-                        # Revert to old behaviour
-                        loaded_objects[model].update(model._default_manager.in_bulk(doc_pks))
+            loaded_objects = load_objects(models_doc_pks, using=self.query._using)
 
         for result in results:
             if self._load_all:
@@ -255,6 +236,12 @@ class SearchQuerySet(object):
 
             to_cache.append(result)
 
+        if self._load_stored and not self._load_all:
+            attach_stored_objects(to_cache, using=self.query._using)
+        elif not self._load_all:
+            # Let the page's results load their objects together, on demand.
+            BatchLoader(to_cache, using=self.query._using).attach()
+
         return to_cache
 
     def __getitem__(self, k):
@@ -464,6 +451,15 @@ class SearchQuerySet(object):
         clone._load_all = True
         return clone
 
+    def load_stored(self):
+        """
+        Populates the objects in the search results from their stored fields,
+        without touching the database. See ``StoredObjectProxy``.
+        """
+        clone = self._clone()
+        clone._load_stored = True
+        return clone
+
     def auto_query(self, query_string, fieldname='content'):
         """
         Performs a best guess constructing the search query.
@@ -507,6 +503,19 @@ class SearchQuerySet(object):
         clone._using = connection_name
         return clone
 
+    def fan_out(self, *aliases):
+        """
+        Runs the search concurrently against several connections (e.g. one
+        per region) & merges the results by score or sort order, summing hit
+        & facet counts.
+
+        Without ``aliases``, every connection the routers return for
+        ``for_read(fan_out=True)`` is used.
+        """
+        clone = self._clone()
+        clone.query.set_fan_out_aliases(aliases)
+        return clone
+
     # Methods that do not return a SearchQuerySet.
 
     def count(self):
@@ -517,6 +526,36 @@ class SearchQuerySet(object):
         """Returns the best/top search result that matches the query."""
         return self[0]
 
+    # Asynchronous counterparts. These run on the backend's async transport &
+    # must be awaited from within an ``asyncio`` (or ``trollius``) event loop.
+    # The work happens on a clone, as the worker threads mustn't race the
+    # caller over ``_result_cache``.
+
+    def _get_async_transport(self):
+        return self.query.backend.get_async_transport()
+
+    def aget(self, k):
+        """
+        Awaitable counterpart of ``sqs[k]``. Resolves to a single result or,
+        when ``k`` is a slice, a list of results.
+        """
+        clone = self._clone()
+        return self._get_async_transport().submit(clone.__getitem__, k)
+
+    def acount(self):
+        """Awaitable counterpart of ``count``."""
+        clone = self._clone()
+        return self._get_async_transport().submit(clone.count)
+
+    def astream(self, page_size=ITERATOR_LOAD_PER_QUERY):
+        """
+        Returns an asynchronous iterator over the results, fetching them
+        ``page_size`` at a time. Use with ``async for``, or await its
+        ``__anext__`` until it raises ``sanjab.utils.aio.StopAsyncIteration``.
+        """
+        from sanjab.utils.aio import AsyncResultIterator
+        return AsyncResultIterator(self, self._get_async_transport(), page_size)
+
     def latest(self, date_field):
         """Returns the most recent search result that matches the query."""
         clone = self._clone()
@@ -604,6 +643,7 @@ class SearchQuerySet(object):
         query = self.query._clone()
         clone = klass(query=query)
         clone._load_all = self._load_all
+        clone._load_stored = self._load_stored
         return clone
 
 
@@ -864,5 +904,6 @@ class RelatedSearchQuerySet(SearchQuerySet):
         query = self.query._clone()
         clone = klass(query=query)
         clone._load_all = self._load_all
+        clone._load_stored = self._load_stored
         clone._load_all_querysets = self._load_all_querysets
         return clone
@@ -1,4 +1,10 @@
 from __future__ import unicode_literals
+import random
+import threading
+import time
+
+from django.conf import settings
+
 from sanjab.constants import DEFAULT_ALIAS
 
 
@@ -13,3 +19,125 @@ class DefaultRouter(BaseRouter):
 
     def for_write(self, **hints):
         return DEFAULT_ALIAS
+
+
+class ConnectionHealth(object):
+    """
+    Tracks an exponentially weighted moving average (EWMA) of the latency &
+    error rate observed on one connection, and whether it is currently
+    ejected from the read rotation.
+    """
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.ejected_until = None
+        # Re-admitted after an ejection & not yet trusted again.
+        self.probation = False
+
+    def record(self, duration, failed):
+        if self.latency is None:
+            self.latency = duration
+        else:
+            self.latency += self.alpha * (duration - self.latency)
+
+        self.error_rate += self.alpha * ((1.0 if failed else 0.0) - self.error_rate)
+        self.samples += 1
+
+    def is_ejected(self, now):
+        return self.ejected_until is not None and now < self.ejected_until
+
+    def score(self, error_penalty):
+        # Unmeasured connections score best, so they get probed.
+        return (self.latency or 0.0) * (1.0 + error_penalty * self.error_rate)
+
+
+class LatencyAwareRouter(BaseRouter):
+    """
+    Spreads reads across several connections (e.g. read replicas), favouring
+    the ones that have been answering fastest, & keeps writes pinned.
+
+    Every query is reported through ``log_query``. Reads go to the better of
+    two randomly picked healthy connections ("power of two choices"), scored
+    by latency EWMA weighted by error-rate EWMA. A connection whose error
+    rate climbs above ``SANJAB_ROUTER_MAX_ERROR_RATE`` is ejected for
+    ``SANJAB_ROUTER_EJECT_SECONDS`` before being probed again.
+
+    Settings:
+
+        * ``SANJAB_READ_CONNECTIONS``: aliases to read from (defaults to
+          every alias in ``SANJAB_CONNECTIONS``).
+        * ``SANJAB_WRITE_CONNECTIONS``: aliases to write to (defaults to
+          ``[DEFAULT_ALIAS]``).
+        * ``SANJAB_ROUTER_EWMA_ALPHA`` (0.3), ``SANJAB_ROUTER_ERROR_PENALTY``
+          (10), ``SANJAB_ROUTER_MAX_ERROR_RATE`` (0.5),
+          ``SANJAB_ROUTER_MIN_SAMPLES`` (5), ``SANJAB_ROUTER_EJECT_SECONDS``
+          (30).
+
+    Given the ``fan_out`` hint, reads return every healthy connection.
+    """
+    def __init__(self):
+        self.read_aliases = list(getattr(settings, 'SANJAB_READ_CONNECTIONS', settings.SANJAB_CONNECTIONS.keys()))
+        self.write_aliases = list(getattr(settings, 'SANJAB_WRITE_CONNECTIONS', [DEFAULT_ALIAS]))
+        self.alpha = getattr(settings, 'SANJAB_ROUTER_EWMA_ALPHA', 0.3)
+        self.error_penalty = getattr(settings, 'SANJAB_ROUTER_ERROR_PENALTY', 10)
+        self.max_error_rate = getattr(settings, 'SANJAB_ROUTER_MAX_ERROR_RATE', 0.5)
+        self.min_samples = getattr(settings, 'SANJAB_ROUTER_MIN_SAMPLES', 5)
+        self.eject_seconds = getattr(settings, 'SANJAB_ROUTER_EJECT_SECONDS', 30)
+        self._health = dict((alias, ConnectionHealth(self.alpha)) for alias in self.read_aliases)
+        self._lock = threading.Lock()
+
+    def record_query(self, alias, duration, failed=False):
+        health = self._health.get(alias)
+
+        if health is None:
+            return
+
+        with self._lock:
+            health.record(duration, failed)
+
+            if health.probation and failed:
+                # Still failing when probed again: back out straight away.
+                eject = True
+            elif health.samples >= self.min_samples:
+                # Trusted again once it went ``min_samples`` queries without
+                # failing since it was re-admitted.
+                health.probation = False
+                eject = health.error_rate > self.max_error_rate
+            else:
+                eject = False
+
+            if eject:
+                health.ejected_until = time.time() + self.eject_seconds
+                # Give it a clean-ish slate for when it's probed again.
+                health.error_rate = self.max_error_rate / 2.0
+                health.samples = 0
+                health.probation = True
+
+    def healthy_aliases(self):
+        now = time.time()
+        return [alias for alias in self.read_aliases if not self._health[alias].is_ejected(now)]
+
+    def for_read(self, **hints):
+        if not self.read_aliases:
+            return None
+
+        candidates = self.healthy_aliases()
+
+        if hints.get('fan_out') and candidates:
+            return candidates
+
+        if not candidates:
+            # Everything is ejected. Rather than failing the read, use the
+            # connection that's due back soonest.
+            return min(self.read_aliases, key=lambda alias: self._health[alias].ejected_until)
+
+        if len(candidates) == 1:
+            return candidates[0]
+
+        pair = random.sample(candidates, 2)
+        return min(pair, key=lambda alias: self._health[alias].score(self.error_penalty))
+
+    def for_write(self, **hints):
+        return self.write_aliases
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 from sanjab.exceptions import NotHandled
+from sanjab.utils.objectcache import invalidate_cached_object
 from django.db import models
 
 
@@ -41,18 +42,41 @@ class BaseSignalProcessor(object):
         update should be sent to & update the object on those backends.
         """
         using_backends = self.connection_router.for_write(instance=instance)
+        # Documents are prepared once & sent to every backend.
+        prepared = {}
 
         for using in using_backends:
             try:
-                indexes = self.connections[using].get_unified_index().get_index(sender)
+                indexes = dict(self.connections[using].get_unified_index().get_index(sender))
                 if 'base' in indexes:
                     base = indexes.pop('base')
+                invalidate_cached_object(sender, indexes.keys(), instance.pk)
                 for doc_type, index in indexes.iteritems():
-                    index.update_object(instance, doc_type=doc_type, using=using, index=index)
+                    index.update_object(instance, doc_type=doc_type, using=using, index=index,
+                                        update_fields=kwargs.get('update_fields'), prepared=prepared)
             except NotHandled:
                 # TODO: Maybe log it or let the exception bubble?
                 pass
 
+            self.handle_related_save(sender, instance, using, **kwargs)
+
+    def handle_related_save(self, sender, instance, using, **kwargs):
+        """
+        Reindexes the objects whose documents are built from ``instance``
+        (e.g. through ``model_attr='category__name'``) on the ``using``
+        backend.
+
+        This happens within the saving request, so at most
+        ``max_related_updates`` objects (100 by default) are reindexed per
+        index; beyond that, they're left to ``update_index``. Use the
+        ``CelerySignalProcessor`` to queue them instead.
+        """
+        unified_index = self.connections[using].get_unified_index()
+
+        for doc_type, index in unified_index.get_dependent_indexes(sender):
+            index.update_related(sender, instance, doc_type, using=using,
+                                 update_fields=kwargs.get('update_fields'))
+
     def handle_delete(self, sender, instance, **kwargs):
         """
         Given an individual model instance, determine which backends the
@@ -62,9 +86,10 @@ class BaseSignalProcessor(object):
 
         for using in using_backends:
             try:
-                indexes = self.connections[using].get_unified_index().get_index(sender)
+                indexes = dict(self.connections[using].get_unified_index().get_index(sender))
                 if 'base' in indexes:
                     base = indexes.pop('base')
+                invalidate_cached_object(sender, indexes.keys(), instance.pk)
                 for doc_type, index in indexes.iteritems():
                     index.remove_object(instance, doc_type=doc_type, using=using)
             except NotHandled:
@@ -98,18 +123,24 @@ class RealtimeSignalProcessor(BaseSignalProcessor):
         update should be sent to & update the object on those backends.
         """
         using_backends = self.connection_router.for_write(instance=instance)
+        # Documents are prepared once & sent to every backend.
+        prepared = {}
 
         for using in using_backends:
             try:
-                indexes = self.connections[using].get_unified_index().get_index(sender)
+                indexes = dict(self.connections[using].get_unified_index().get_index(sender))
                 if 'base' in indexes:
                     base = indexes.pop('base')
+                invalidate_cached_object(sender, indexes.keys(), instance.pk)
                 for doc_type, index in indexes.iteritems():
-                    index.update_object(instance, doc_type=doc_type, using=using, index=index)
+                    index.update_object(instance, doc_type=doc_type, using=using, index=index,
+                                        update_fields=kwargs.get('update_fields'), prepared=prepared)
             except NotHandled:
                 # TODO: Maybe log it or let the exception bubble?
                 pass
 
+            self.handle_related_save(sender, instance, using, **kwargs)
+
     def handle_delete(self, sender, instance, **kwargs):
         """
         Given an individual model instance, determine which backends the
@@ -119,9 +150,10 @@ class RealtimeSignalProcessor(BaseSignalProcessor):
 
         for using in using_backends:
             try:
-                indexes = self.connections[using].get_unified_index().get_index(sender)
+                indexes = dict(self.connections[using].get_unified_index().get_index(sender))
                 if 'base' in indexes:
                     base = indexes.pop('base')
+                invalidate_cached_object(sender, indexes.keys(), instance.pk)
                 for doc_type, index in indexes.iteritems():
                     index.remove_object(instance, doc_type=doc_type, using=using)
             except NotHandled:
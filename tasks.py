@@ -100,6 +100,9 @@ class CelerySanjabSignalHandler(Task):
         Trigger the actual index handler depending on the
         given action ('update' or 'delete').
         """
+        if action == 'update_batch':
+            return self.update_batch(identifier, kwargs.get('doc_type'), kwargs.get('pks', []))
+
         # First get the object path and pk (e.g. ('notes.note', 23))
         object_path, pk = self.split_identifier(identifier, **kwargs)
         if object_path is None or pk is None:
@@ -149,6 +152,28 @@ class CelerySanjabSignalHandler(Task):
                 raise ValueError("Unrecognized action %s" % action)
 
 
+    def update_batch(self, object_path, doc_type, pks):
+        """
+        Reindexes the objects ``pks`` of the model at ``object_path`` as
+        ``doc_type`` (e.g. the ones depending on a saved related object).
+        """
+        model_class = self.get_model_class(object_path)
+
+        for indexes, using in self.get_indexes(model_class):
+            index = indexes.get(doc_type)
+
+            if index is None:
+                continue
+
+            try:
+                index.update_pks(doc_type, pks, using=using)
+            except Exception as exc:
+                logger.exception(exc)
+                self.retry(exc=exc)
+            else:
+                logger.debug("Updated %d '%s' objects (as %s)" % (len(pks), object_path, doc_type))
+
+
 class CelerySanjabUpdateIndex(Task):
     """
     A celery task class to be used to call the update_index management
@@ -0,0 +1,38 @@
+from __future__ import unicode_literals
+
+from django.test import SimpleTestCase
+
+from sanjab.elasticsearch.search import Search
+
+
+class StubQuery(object):
+    _using = None
+
+
+class SearchPostProcessResultsTestCase(SimpleTestCase):
+    """
+    The DSL ``Search`` gets its results through ``raw_search``, as plain
+    ``_source`` dicts, which have no object to load.
+    """
+    def get_search(self, load_stored=False):
+        # Skips ``__init__``, which needs a configured connection.
+        search = Search.__new__(Search)
+        search._query = StubQuery()
+        search._load_all = False
+        search._load_stored = load_stored
+        search._ignored_result_count = 0
+        return search
+
+    def get_results(self):
+        return [
+            {'pk': '1', 'django_ct': 'core.note', 'django_id': '1', 'title': 'First'},
+            {'pk': '2', 'django_ct': 'core.note', 'django_id': '2', 'title': 'Second'},
+        ]
+
+    def test_raw_results(self):
+        results = self.get_results()
+        self.assertEqual(self.get_search().post_process_results(results), self.get_results())
+
+    def test_load_stored_raw_results(self):
+        results = self.get_results()
+        self.assertEqual(self.get_search(load_stored=True).post_process_results(results), self.get_results())
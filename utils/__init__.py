@@ -76,6 +76,43 @@ def get_model_ct(model):
     return "%s.%s" % get_model_ct_tuple(model)
 
 
+def get_model_field(model, name):
+    """
+    Looks up ``name`` among the fields & relations of ``model``.
+
+    Returns a ``(field, related_model, many, null)`` tuple, where
+    ``related_model`` is ``None`` for plain fields, ``many`` tells whether the
+    relation yields several objects & ``null`` whether it may be empty.
+    Returns ``None`` if ``name`` isn't a field (e.g. a property or method).
+    """
+    from django.db.models.fields import FieldDoesNotExist
+
+    opts = model._meta
+
+    try:
+        if hasattr(opts, 'get_field_by_name'):
+            field, _, direct, m2m = opts.get_field_by_name(name)
+        else:
+            field = opts.get_field(name)
+            direct, m2m = field.concrete, field.many_to_many
+    except FieldDoesNotExist:
+        return None
+
+    if direct:
+        rel = getattr(field, 'rel', None)
+
+        if rel is None:
+            return (field, None, False, field.null)
+
+        return (field, rel.to, m2m, field.null)
+
+    # A reverse relation. The field on the other side tells whether it's a
+    # one-to-one (a single, possibly missing, object) or yields many.
+    remote_field = field.field
+    related_model = getattr(field, 'related_model', None) or field.model
+    return (field, related_model, m2m or not remote_field.unique, True)
+
+
 def get_facet_field_name(fieldname):
     if fieldname in [ID, DJANGO_ID, DJANGO_CT]:
         return fieldname
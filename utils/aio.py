@@ -0,0 +1,146 @@
+from __future__ import unicode_literals
+import threading
+
+from sanjab.exceptions import MissingDependency
+
+try:
+    import asyncio
+except ImportError:
+    try:
+        # The asyncio backport for Python 2.
+        import trollius as asyncio
+    except ImportError:
+        asyncio = None
+
+try:
+    # Part of the standard library on Python 3, of the 'futures' backport on 2.
+    from concurrent import futures
+except ImportError:
+    futures = None
+
+try:
+    StopAsyncIteration = StopAsyncIteration
+except NameError:
+    # Python < 3.5 has no ``async for``: iterate with ``__anext__`` & stop on this.
+    class StopAsyncIteration(Exception):
+        pass
+
+
+class AsyncTransport(object):
+    """
+    Runs blocking search calls on a dedicated pool of worker threads and hands
+    back ``asyncio`` awaitables, so independent queries can be awaited
+    concurrently (e.g. with ``asyncio.gather``) without blocking the loop.
+
+    If a ``client_factory`` is given, the transport builds its own client
+    from it. Calls made from the transport's workers should talk to the
+    search engine through ``client_for``, which keeps async traffic on the
+    transport's own connection pool instead of the synchronous one.
+    """
+    def __init__(self, max_workers=10, client_factory=None):
+        if asyncio is None or futures is None:
+            raise MissingDependency("The async search API requires 'asyncio' (or 'trollius' & 'futures' on Python 2).")
+
+        self.max_workers = max_workers
+        self.client_factory = client_factory
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    @property
+    def client(self):
+        if self._client is None and self.client_factory is not None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self.client_factory(self.max_workers)
+
+        return self._client
+
+    def in_worker(self):
+        """Returns ``True`` when called from one of the transport's workers."""
+        return getattr(self._local, 'active', False)
+
+    def client_for(self, default):
+        """
+        Returns the client a call should use: the transport's own client when
+        running on one of its workers, ``default`` otherwise.
+        """
+        if self.in_worker() and self.client is not None:
+            return self.client
+
+        return default
+
+    def _call(self, func, args, kwargs):
+        self._local.active = True
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._local.active = False
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedules ``func(*args, **kwargs)`` on a worker and returns an
+        awaitable for its result. Must be called from within an event loop.
+        """
+        return asyncio.wrap_future(self._executor.submit(self._call, func, args, kwargs))
+
+    def resolved(self, value):
+        """Returns an awaitable that is already resolved to ``value``."""
+        future = futures.Future()
+        future.set_result(value)
+        return asyncio.wrap_future(future)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncResultIterator(object):
+    """
+    Asynchronous iterator over a ``SearchQuerySet``, fetching results a page
+    at a time on the backend's async transport. Use with ``async for``, or
+    by awaiting ``__anext__`` until it raises ``StopAsyncIteration`` where
+    there's no ``async for``.
+
+    The pages are fetched on a clone, so the worker threads never touch the
+    caller's queryset.
+    """
+    def __init__(self, searchqueryset, transport, page_size):
+        self.searchqueryset = searchqueryset._clone()
+        self.transport = transport
+        self.page_size = page_size
+        self._buffer = []
+        self._position = 0
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    def _next_page(self):
+        # A page may hold nothing but results that no longer load, so keep
+        # fetching until one yields something or the results run out.
+        while not self._buffer and not self._exhausted:
+            start = self._position
+            page = self.searchqueryset[start:start + self.page_size]
+            self._position += self.page_size
+            self._buffer.extend(result for result in page if result is not None)
+
+            if len(page) < self.page_size:
+                self._exhausted = True
+
+        if not self._buffer:
+            raise StopAsyncIteration
+
+        return self._buffer.pop(0)
+
+    def __anext__(self):
+        if self._buffer:
+            return self.transport.resolved(self._buffer.pop(0))
+
+        if self._exhausted:
+            future = futures.Future()
+            future.set_exception(StopAsyncIteration())
+            return asyncio.wrap_future(future)
+
+        return self.transport.submit(self._next_page)
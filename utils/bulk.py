@@ -0,0 +1,176 @@
+from __future__ import unicode_literals
+import threading
+import time
+
+from elasticsearch.exceptions import ConnectionTimeout, TransportError
+
+from sanjab.utils import log as logging
+
+# Action metadata, sent on the action line rather than in the document.
+META_FIELDS = ('_index', '_type', '_id', '_parent', '_routing', '_version', '_version_type', '_retry_on_conflict')
+
+
+def action_key(doc):
+    return (doc.get('_type'), doc['_id'])
+
+
+def encode_action(doc, serializer):
+    """
+    Encodes ``doc`` as the lines of a bulk action: the action & its metadata,
+    then the document (none for a ``'delete'``).
+    """
+    # The JSON serializer escapes non-ASCII characters, so the length of the
+    # lines is their size in bytes.
+    op_type = doc.get('_op_type', 'index')
+    meta = {}
+    source = {}
+
+    for key, value in doc.items():
+        if key in META_FIELDS:
+            meta[key] = value
+        elif key != '_op_type':
+            source[key] = value
+
+    if op_type == 'delete':
+        return '%s\n' % serializer.dumps({op_type: meta})
+
+    return '%s\n%s\n' % (serializer.dumps({op_type: meta}), serializer.dumps(source))
+
+
+class BulkSender(object):
+    """
+    Sends documents with Elasticsearch's bulk API in chunks sized by payload
+    bytes rather than by document count.
+
+    The chunk size adapts to the observed latency: it grows by
+    ``step_bytes`` while bulk requests take less than ``target_latency``
+    seconds & is halved when they take longer or get rejected, staying
+    within ``min_bytes``/``max_bytes``. Documents rejected with a 429 (a
+    full bulk queue on the cluster) are sent again after an exponential
+    backoff, at most ``max_retries`` times.
+    """
+    def __init__(self, conn, index_name, max_bytes=5 * 1024 * 1024, min_bytes=64 * 1024,
+                 step_bytes=256 * 1024, target_latency=1.0, max_retries=3, initial_backoff=0.5):
+        self.conn = conn
+        self.index_name = index_name
+        self.max_bytes = max_bytes
+        self.min_bytes = min(min_bytes, max_bytes)
+        self.step_bytes = step_bytes
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.chunk_bytes = self.max_bytes
+        self.log = logging.getLogger('sanjab')
+        self._lock = threading.Lock()
+
+    def send(self, docs):
+        """
+        Indexes ``docs``, each naming its ``_id`` & ``_type``. Like with the
+        ``elasticsearch.helpers``, an ``_op_type`` of ``'delete'`` or
+        ``'update'`` (with the partial document under ``doc``) sends another
+        action instead.
+
+        Returns ``(done, failed, rejected)``: the ``(type, id)`` keys of the
+        documents the cluster took, ``((type, id), error)`` pairs for the ones
+        it refused & the keys of those still rejected after all retries.
+        """
+        serializer = self.conn.transport.serializer
+        return self.send_encoded([(action_key(doc), encode_action(doc, serializer)) for doc in docs])
+
+    def send_encoded(self, pending):
+        """
+        Like ``send``, for already encoded actions: ``(key, lines)`` pairs,
+        ``key`` being the ``(type, id)`` of the document & ``lines`` what
+        ``encode_action`` returns for it.
+        """
+        indexed = []
+        failed = []
+        rejected = []
+        attempt = 0
+
+        while pending:
+            retry = []
+
+            for chunk in self.chunk(pending):
+                chunk_indexed, chunk_retry, chunk_failed = self.send_chunk(chunk)
+                indexed.extend(chunk_indexed)
+                retry.extend(chunk_retry)
+                failed.extend(chunk_failed)
+
+            if retry and attempt < self.max_retries:
+                delay = self.initial_backoff * (2 ** attempt)
+                self.log.warning("Elasticsearch rejected %d documents, retrying in %.1fs.", len(retry), delay)
+                time.sleep(delay)
+                attempt += 1
+                pending = retry
+            else:
+                rejected.extend(key for key, lines in retry)
+                pending = []
+
+        return indexed, failed, rejected
+
+    def chunk(self, pending):
+        """Splits ``pending`` into chunks of about ``chunk_bytes``."""
+        chunk, size = [], 0
+
+        for item in pending:
+            item_size = len(item[1])
+
+            if chunk and size + item_size > self.chunk_bytes:
+                yield chunk
+                chunk, size = [], 0
+
+            chunk.append(item)
+            size += item_size
+
+        if chunk:
+            yield chunk
+
+    def send_chunk(self, chunk):
+        """
+        Sends one chunk. Returns ``(indexed, retry, failed)``, ``retry``
+        holding the items to send again.
+        """
+        start = time.time()
+
+        try:
+            response = self.conn.bulk(body=''.join(lines for key, lines in chunk), index=self.index_name)
+        except TransportError as e:
+            if isinstance(e, ConnectionTimeout) or e.status_code == 429:
+                self.adapt(None)
+                return [], chunk, []
+
+            raise
+
+        self.adapt(time.time() - start)
+        indexed, retry, failed = [], [], []
+
+        for (key, lines), item in zip(chunk, response.get('items', [])):
+            op_type, result = list(item.items())[0]
+            status = result.get('status', 200)
+
+            if status == 429:
+                retry.append((key, lines))
+            elif status == 404 and op_type == 'delete':
+                # Already gone.
+                indexed.append(key)
+            elif status >= 300:
+                failed.append((key, result.get('error')))
+            else:
+                indexed.append(key)
+
+        if retry:
+            self.adapt(None)
+
+        return indexed, retry, failed
+
+    def adapt(self, latency):
+        """
+        Grows the chunk size after a fast request, halves it after a slow or
+        rejected one (``latency`` is ``None``).
+        """
+        with self._lock:
+            if latency is not None and latency <= self.target_latency:
+                self.chunk_bytes = min(self.chunk_bytes + self.step_bytes, self.max_bytes)
+            else:
+                self.chunk_bytes = max(self.chunk_bytes // 2, self.min_bytes)
@@ -0,0 +1,97 @@
+from __future__ import unicode_literals
+import datetime
+
+from django.db import models
+
+try:
+    from django.utils.timezone import utc
+except ImportError:
+    utc = None
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def to_millis(value):
+    """
+    Converts a date or datetime to milliseconds since the epoch, the way
+    Elasticsearch stores it (naive datetimes are taken as UTC).
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None and utc is not None:
+            value = value.astimezone(utc).replace(tzinfo=None)
+
+        delta = value - EPOCH
+    else:
+        delta = value - EPOCH.date()
+
+    return delta.days * 86400000 + delta.seconds * 1000 + delta.microseconds // 1000
+
+
+def has_integer_pk(model):
+    """Tells whether ``model`` has an integer primary key, which bucketing needs."""
+    pk = model._meta.pk
+
+    # Multi-table inheritance: the pk points at the parent's.
+    while getattr(pk, 'rel', None) is not None:
+        pk = pk.rel.get_related_field()
+
+    return isinstance(pk, (models.AutoField, models.IntegerField))
+
+
+def get_updated_index_field(index):
+    """
+    Returns the name the index stores ``get_updated_field`` under, if one of
+    its date fields is filled from it straight away, ``None`` otherwise.
+    """
+    updated_field = index.get_updated_field()
+
+    if not updated_field:
+        return None
+
+    for field in index.fields.values():
+        if field.model_attr_path == (updated_field,) and field.field_type in ('date', 'datetime'):
+            if not field.use_template and getattr(index, 'prepare_%s' % field.instance_name, None) is None:
+                return field.index_fieldname
+
+    return None
+
+
+def db_bucket_stats(queryset, bucket_size, updated_field=None, chunk_size=10000):
+    """
+    Aggregates the rows of ``queryset`` into buckets of ``bucket_size``
+    consecutive pks, reading ``chunk_size`` rows at a time in pk order, so
+    memory stays bounded however big the table.
+
+    Returns ``{bucket: (count, pk_sum, updated_sum)}``, ``updated_sum``
+    summing ``updated_field`` in milliseconds (``0`` without one), like
+    ``ElasticsearchSearchBackend.get_bucket_stats`` does on the index side.
+    """
+    columns = ['pk'] + ([updated_field] if updated_field else [])
+    queryset = queryset.order_by('pk')
+    stats = {}
+    last_pk = None
+
+    while True:
+        # Keyset pagination: each chunk starts right after the last pk.
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list(*columns)[:chunk_size])
+
+        for row in rows:
+            pk = row[0]
+            bucket = pk // bucket_size
+            count, pk_sum, updated_sum = stats.get(bucket, (0, 0, 0))
+
+            if updated_field and row[1] is not None:
+                updated_sum += to_millis(row[1])
+
+            stats[bucket] = (count + 1, pk_sum + pk, updated_sum)
+
+        if len(rows) < chunk_size:
+            break
+
+        last_pk = rows[-1][0]
+
+    return stats
@@ -0,0 +1,59 @@
+from __future__ import unicode_literals
+import gzip
+import json
+
+from sanjab.utils.bulk import action_key, encode_action
+
+
+def open_dump(path, mode='rb'):
+    """Opens a dump file, gzipped if its name ends with ``.gz``."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)
+
+    return open(path, mode)
+
+
+class DumpWriter(object):
+    """
+    Streams prepared documents to a file of bulk-ready action lines
+    (NDJSON), which ``load_index`` sends to any cluster as is.
+
+    The actions carry no ``_index``, so the one of the loading connection
+    applies.
+    """
+    def __init__(self, path, serializer):
+        self.path = path
+        self.serializer = serializer
+        self.count = 0
+        self._file = open_dump(path, 'wb')
+
+    def send(self, doc_type, docs):
+        """Writes ``docs``, like ``FanOutWriter.send`` would send them."""
+        for doc in docs:
+            doc['_type'] = doc_type
+            self._file.write(encode_action(doc, self.serializer).encode('utf-8'))
+            self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+def read_actions(path):
+    """
+    Yields the actions of a dump file one at a time, as ``(key, lines)``
+    pairs ready for ``BulkSender.send_encoded``.
+    """
+    with open_dump(path, 'rb') as dump:
+        for line in dump:
+            if not line.strip():
+                continue
+
+            action_line = line.decode('utf-8')
+            action = json.loads(action_line)
+            op_type, meta = list(action.items())[0]
+            lines = action_line
+
+            if op_type != 'delete':
+                lines += next(dump).decode('utf-8')
+
+            yield action_key(meta), lines
@@ -0,0 +1,102 @@
+from __future__ import unicode_literals
+import threading
+
+from django.utils.six.moves import queue
+
+from sanjab.utils import log as logging
+
+_STOP = object()
+
+
+class FanOutWriter(object):
+    """
+    Writes prepared documents to several backends (e.g. a primary cluster &
+    a migration target) at once, so they're prepared only once.
+
+    Each backend gets its own thread & its own queue of at most
+    ``queue_size`` batches, which keeps memory bounded. A slow or dead
+    backend never holds up the others: once it's that many batches behind,
+    further batches go to its spool (see ``SPOOL_PATH``) if it has one, or
+    are dropped & counted in ``dropped``.
+    """
+    def __init__(self, backends, queue_size=4):
+        self.backends = list(backends)
+        self.log = logging.getLogger('sanjab')
+        self.skipped = dict((backend.connection_alias, 0) for backend in self.backends)
+        self.dropped = dict((backend.connection_alias, 0) for backend in self.backends)
+        self._errors = []
+        self._queues = []
+        self._threads = []
+
+        for backend in self.backends:
+            in_queue = queue.Queue(queue_size)
+            thread = threading.Thread(target=self._write, args=(backend, in_queue))
+            thread.daemon = True
+            thread.start()
+            self._queues.append(in_queue)
+            self._threads.append(thread)
+
+    def send(self, doc_type, docs):
+        """
+        Queues ``docs`` (see ``prepare_documents``) for every backend, without
+        blocking.
+        """
+        if self._errors:
+            raise self._errors[0]
+
+        for backend, in_queue in zip(self.backends, self._queues):
+            try:
+                in_queue.put_nowait((doc_type, docs))
+            except queue.Full:
+                self.overflow(backend, doc_type, docs)
+
+    def overflow(self, backend, doc_type, docs):
+        """Handles a batch ``backend`` is too far behind to queue."""
+        alias = backend.connection_alias
+
+        if getattr(backend, 'spool_path', None):
+            # Its writer sends through the spool too from now on, in order.
+            self.log.warning("'%s' is falling behind, spooling %d '%s' documents.", alias, len(docs), doc_type)
+            backend.spool_documents([(doc_type, [dict(doc) for doc in docs])])
+        else:
+            self.log.error("'%s' is falling behind, dropping %d '%s' documents.", alias, len(docs), doc_type)
+            self.dropped[alias] += len(docs)
+
+    def close(self, commit=True):
+        """
+        Waits for every backend to write what was queued, then refreshes
+        them. Raises the first error any of them ran into.
+        """
+        for in_queue in self._queues:
+            in_queue.put(_STOP)
+
+        for thread in self._threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+        if commit:
+            for backend in self.backends:
+                backend.refresh()
+
+    def _write(self, backend, in_queue):
+        while True:
+            item = in_queue.get()
+
+            if item is _STOP:
+                break
+
+            if self._errors:
+                # Keep draining, so ``send`` never blocks on a dead writer.
+                continue
+
+            doc_type, docs = item
+
+            try:
+                # Backends add their own keys to the documents they send.
+                result = backend.bulk_update(doc_type, [dict(doc) for doc in docs], commit=False)
+                self.skipped[backend.connection_alias] += len(getattr(result, 'skipped', None) or [])
+            except Exception as e:
+                self.log.error("Writing '%s' documents to '%s' failed: %s", doc_type, backend.connection_alias, e)
+                self._errors.append(e)
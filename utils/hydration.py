@@ -0,0 +1,370 @@
+from __future__ import unicode_literals
+import types
+
+from django.conf import settings
+from django.utils import six
+
+from sanjab.exceptions import NotHandled
+from sanjab.utils import log as logging
+from sanjab.utils.objectcache import cache_objects, get_cached_objects
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    from django.utils.encoding import force_unicode as force_text
+
+log = logging.getLogger('sanjab')
+
+_load_pool = None
+
+
+def get_load_pool():
+    """
+    Returns the thread pool objects of different models are loaded on, sized
+    by ``SANJAB_LOAD_ALL_THREADS`` (4 by default).
+    """
+    global _load_pool
+
+    if _load_pool is None:
+        from multiprocessing.pool import ThreadPool
+        _load_pool = ThreadPool(getattr(settings, 'SANJAB_LOAD_ALL_THREADS', 4))
+
+    return _load_pool
+
+
+def get_hydration_queryset(model, doc_type, using=None):
+    """
+    Returns the QuerySet objects of ``model`` indexed as ``doc_type`` are
+    loaded from, with the index's hydration plan applied.
+    """
+    from sanjab import connections
+    from sanjab.constants import DEFAULT_ALIAS
+
+    try:
+        index = connections[using or DEFAULT_ALIAS].get_unified_index().get_index(model)
+        model_index = index.get(doc_type)
+
+        if model_index is None:
+            log.warning("IndexModel was not found for type: %s", doc_type)
+            model_index = index.get('base')
+
+        if model_index is None:
+            # Neither this doc type nor a base index is registered.
+            raise NotHandled
+
+        return model_index.hydration_queryset(using=using)
+    except NotHandled:
+        log.warning("Model '%s' not handled by the routers", model)
+        # Revert to old behaviour
+        return model._default_manager.all()
+
+
+def _load_model(model, doc_pks, using, chunk_size):
+    loaded = {}
+
+    for doc_type, pks in doc_pks.items():
+        queryset = get_hydration_queryset(model, doc_type, using=using)
+
+        # Bounded chunks keep clear of the database's parameter limits.
+        for start in range(0, len(pks), chunk_size):
+            chunk = pks[start:start + chunk_size]
+            cached = get_cached_objects(model, doc_type, chunk)
+            loaded.update(cached)
+            hits = set(force_text(pk) for pk in cached)
+            misses = [pk for pk in chunk if force_text(pk) not in hits]
+
+            if misses:
+                objects = queryset.in_bulk(misses)
+                cache_objects(model, doc_type, objects.values())
+                loaded.update(objects)
+
+    return loaded
+
+
+def _load_model_in_thread(args):
+    from django.db import connections as db_connections
+
+    # Pool threads keep their database connections for the pool's lifetime,
+    # only dropping the ones a previous job left unusable.
+    for conn in db_connections.all():
+        if getattr(conn, 'errors_occurred', False):
+            if conn.connection is not None and not conn.is_usable():
+                conn.close()
+
+            conn.errors_occurred = False
+
+    return _load_model(*args)
+
+
+def in_atomic_block():
+    """
+    Tells whether a transaction is open on any database, whose uncommitted
+    rows other threads' connections wouldn't see.
+    """
+    from django.db import connections as db_connections
+
+    return any(getattr(conn, 'in_atomic_block', False) for conn in db_connections.all())
+
+
+def load_objects(models_doc_pks, using=None):
+    """
+    Loads the objects behind search results.
+
+    Takes ``{model: {doc_type: [pk, ...]}}`` & returns ``{model: {pk: obj}}``.
+    Primary keys are fetched ``SANJAB_LOAD_ALL_CHUNK_SIZE`` (500) at a time;
+    when several models are involved, each is loaded on its own pool thread,
+    unless a transaction is open (see ``in_atomic_block``). With
+    ``SANJAB_OBJECT_CACHE`` set, objects are looked up in that cache first &
+    only the misses are fetched from the database.
+    """
+    chunk_size = getattr(settings, 'SANJAB_LOAD_ALL_CHUNK_SIZE', 500)
+    models = list(models_doc_pks.keys())
+    jobs = [(model, models_doc_pks[model], using, chunk_size) for model in models]
+
+    if len(jobs) > 1 and not in_atomic_block():
+        loaded = get_load_pool().map(_load_model_in_thread, jobs)
+    else:
+        loaded = [_load_model(*job) for job in jobs]
+
+    return dict(zip(models, loaded))
+
+
+class BatchLoader(object):
+    """
+    Loads the database objects behind a page of ``SearchResult``s in bulk.
+
+    Results sharing a loader fetch their objects together: the first access
+    to ``result.object`` loads every sibling of the same model & doc type with
+    a single ``in_bulk`` query, so iterating over a page doesn't cost a query
+    per result.
+    """
+    def __init__(self, results, using=None):
+        self.results = [result for result in results if result._object is None]
+        self.using = using
+        self._loaded = set()
+
+    def attach(self):
+        for result in self.results:
+            result._loader = self
+
+        return self
+
+    def load(self, result):
+        """
+        Loads the objects of ``result`` & of every sibling with the same model
+        and doc type. Objects gone from the database are left as ``None``.
+        """
+        group = (result.model, result.doc_type)
+
+        if group in self._loaded:
+            return
+
+        self._loaded.add(group)
+        siblings = [sibling for sibling in self.results
+                    if (sibling.model, sibling.doc_type) == group and sibling._object is None]
+        doc_pks = {result.doc_type: [sibling.pk for sibling in siblings]}
+        objects = load_objects({result.model: doc_pks}, using=self.using)[result.model]
+
+        for sibling in siblings:
+            # We have to deal with integer keys being cast from strings
+            if sibling.pk not in objects:
+                try:
+                    sibling.pk = int(sibling.pk)
+                except ValueError:
+                    pass
+
+            sibling._object = objects.get(sibling.pk)
+
+
+class _StoredRecord(object):
+    """The bits of a result a ``BatchLoader`` needs to load its object."""
+    def __init__(self, model, doc_type, pk):
+        self.model = model
+        self.doc_type = doc_type
+        self.pk = pk
+        self._object = None
+        self._loader = None
+
+
+class StoredObjectProxy(object):
+    """
+    A read-only stand-in for a model instance, built from the fields stored
+    in the search engine.
+
+    Attributes backed by a stored field with a plain ``model_attr`` are served
+    from the index (run through the field's ``convert``). Model methods &
+    properties are evaluated against the proxy, so they work as long as they
+    only need stored attributes. Accessing anything else loads the real object
+    from the database, together with the other proxies of the page.
+    """
+    def __init__(self, record, values):
+        object.__setattr__(self, '_record', record)
+        object.__setattr__(self, '_meta', record.model._meta)
+        object.__setattr__(self, 'pk', record.pk)
+
+        for attr, value in values.items():
+            object.__setattr__(self, attr, value)
+
+    def __repr__(self):
+        return "<StoredObjectProxy: %s (pk=%r)>" % (self._meta.object_name, self.pk)
+
+    def _model_method(self, name):
+        # A method the model itself defines, bound to the proxy.
+        from django.db import models
+
+        for klass in self._meta.concrete_model.__mro__:
+            if klass is models.Model:
+                break
+
+            if name in klass.__dict__:
+                return types.MethodType(klass.__dict__[name], self)
+
+        return None
+
+    def __unicode__(self):
+        method = self._model_method('__unicode__') or self._model_method('__str__')
+
+        if method is not None:
+            return force_text(method())
+
+        return force_text(self.get_object())
+
+    def __str__(self):
+        if six.PY2:
+            return self.__unicode__().encode('utf-8')
+
+        return self.__unicode__()
+
+    def __eq__(self, other):
+        # Like ``Model.__eq__``: the same kind of object, with the same pk.
+        other_meta = getattr(other, '_meta', None)
+
+        if other_meta is None or other_meta.concrete_model is not self._meta.concrete_model:
+            return False
+
+        return self.pk is not None and force_text(self.pk) == force_text(other.pk)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(force_text(self.pk))
+
+    def __setattr__(self, attr, value):
+        raise AttributeError("'%s' is a read-only view of stored fields." % self._meta.object_name)
+
+    def get_object(self):
+        """Returns the database object behind the proxy (or ``None``)."""
+        record = self._record
+
+        if record._object is None and record._loader is not None:
+            record._loader.load(record)
+
+        return record._object
+
+    def __getattr__(self, attr):
+        from django.db import models
+
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        for klass in self._meta.concrete_model.__mro__:
+            if klass is models.Model:
+                # ``save``, ``delete`` & co. must act on the real object, not
+                # on a half-populated proxy.
+                break
+
+            if attr in klass.__dict__:
+                descriptor = klass.__dict__[attr]
+
+                if isinstance(descriptor, property):
+                    return descriptor.fget(self)
+
+                if isinstance(descriptor, types.FunctionType):
+                    return types.MethodType(descriptor, self)
+
+                break
+
+        obj = self.get_object()
+
+        if obj is None:
+            raise AttributeError("The object behind '%r' could not be loaded to look up '%s'." % (self, attr))
+
+        return getattr(obj, attr)
+
+
+def get_stored_attrs(index):
+    """
+    Returns ``(attr, field)`` pairs for the stored fields of ``index`` that map
+    straight onto a concrete, non-relational field of the model. Others (e.g.
+    methods) mustn't be shadowed by their stored value.
+    """
+    from django.db.models.fields import FieldDoesNotExist
+
+    model = index.get_model()
+    attrs = []
+
+    for field in index.fields.values():
+        if not field.stored or not field.model_attr or '__' in field.model_attr:
+            continue
+
+        try:
+            model_field, _, direct, m2m = model._meta.get_field_by_name(field.model_attr)
+        except FieldDoesNotExist:
+            continue
+
+        if direct and not m2m and getattr(model_field, 'rel', None) is None:
+            attrs.append((field.model_attr, field))
+
+    return attrs
+
+
+def attach_stored_objects(results, using=None):
+    """
+    Sets each result's ``object`` to a ``StoredObjectProxy``, sharing one
+    ``BatchLoader`` for any database fallbacks.
+    """
+    from sanjab import connections
+    from sanjab.constants import DEFAULT_ALIAS
+
+    ui = connections[using or DEFAULT_ALIAS].get_unified_index()
+    plans = {}
+    records = []
+    plain = []
+
+    for result in results:
+        if result._object is not None or result.model is None:
+            continue
+
+        group = (result.model, result.doc_type)
+
+        if group not in plans:
+            try:
+                index = ui.get_index(result.model)
+                index = index.get(result.doc_type) or index.get('base')
+            except NotHandled:
+                index = None
+
+            plans[group] = get_stored_attrs(index) if index is not None else None
+
+        if plans[group] is None:
+            # No index to tell what's stored: load it like any other result.
+            plain.append(result)
+            continue
+
+        values = {}
+
+        for attr, field in plans[group]:
+            # Null values aren't sent to the engine, so a stored field that
+            # didn't come back is ``None`` rather than unknown.
+            value = result.__dict__.get(field.index_fieldname)
+            values[attr] = field.convert(value) if value is not None else None
+
+        record = _StoredRecord(result.model, result.doc_type, result.pk)
+        records.append(record)
+        result._object = StoredObjectProxy(record, values)
+
+    BatchLoader(records, using=using).attach()
+
+    if plain:
+        BatchLoader(plain, using=using).attach()
@@ -61,6 +61,7 @@ def load_router(full_router_path):
     available include::
 
       * sanjab.routers.DefaultRouter
+      * sanjab.routers.LatencyAwareRouter
 
     If you've implemented a custom backend, you can provide the path to
     your backend & matching ``Engine`` class. For example::
@@ -131,7 +132,9 @@ class ConnectionRouter(object):
                 action_callable = getattr(router, action)
                 connection_to_use = action_callable(**hints)
 
-                if connection_to_use is not None:
+                if isinstance(connection_to_use, (list, tuple)):
+                    conns.extend(connection_to_use)
+                elif connection_to_use is not None:
                     conns.append(connection_to_use)
 
         return conns
@@ -142,6 +145,15 @@ class ConnectionRouter(object):
     def for_read(self, **hints):
         return self.for_action('for_read', **hints)
 
+    def record_query(self, alias, duration, failed=False):
+        """
+        Reports how a query against ``alias`` went to every router that
+        keeps track of it (see ``LatencyAwareRouter``).
+        """
+        for router in self.routers:
+            if hasattr(router, 'record_query'):
+                router.record_query(alias, duration, failed=failed)
+
 
 class UnifiedIndex(object):
     # Used to collect all the indexes into a cohesive whole.
@@ -155,6 +167,7 @@ class UnifiedIndex(object):
         self.document_field = getattr(settings, 'SANJAB_DOCUMENT_FIELD', 'text')
         self._fieldnames = {}
         self._facet_fieldnames = {}
+        self._dependents = None
 
     def collect_indexes(self):
         indexes = []
@@ -195,6 +208,7 @@ class UnifiedIndex(object):
         self._built = False
         self._fieldnames = {}
         self._facet_fieldnames = {}
+        self._dependents = None
 
     def all_index_objects(self):
         if not self._built:
@@ -328,6 +342,30 @@ class UnifiedIndex(object):
 
         return self.indexes[model_klass]
 
+    def get_dependent_indexes(self, model_klass):
+        """
+        Returns the ``(doc_type, index)`` pairs whose documents are built from
+        objects of ``model_klass`` (see
+        ``SearchIndex.get_related_dependencies``).
+        """
+        if not self._built:
+            self.build()
+
+        if self._dependents is None:
+            dependents = {}
+
+            for model, indexes in self.indexes.iteritems():
+                for doc_type, index in indexes.iteritems():
+                    if doc_type == 'base':
+                        continue
+
+                    for related_model in index.get_related_dependencies():
+                        dependents.setdefault(related_model, []).append((doc_type, index))
+
+            self._dependents = dependents
+
+        return self._dependents.get(model_klass, [])
+
     def get_facet_fieldname(self, field):
         if not self._built:
             self.build()
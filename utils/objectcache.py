@@ -0,0 +1,70 @@
+from __future__ import unicode_literals
+from django.conf import settings
+
+from sanjab.utils import get_model_ct
+
+try:
+    from django.core.cache import caches
+
+    def _get_cache(alias):
+        return caches[alias]
+except ImportError:
+    from django.core.cache import get_cache as _get_cache
+
+
+def get_object_cache():
+    """
+    Returns the Django cache hydrated objects are kept in, as named by
+    ``SANJAB_OBJECT_CACHE``, or ``None`` when object caching is off (the
+    default).
+    """
+    alias = getattr(settings, 'SANJAB_OBJECT_CACHE', None)
+
+    if not alias:
+        return None
+
+    return _get_cache(alias)
+
+
+def object_cache_key(model, doc_type, pk):
+    # Keyed by doc type too, as each index can have its own hydration plan.
+    return 'sanjab:object:%s:%s:%s' % (get_model_ct(model), doc_type, pk)
+
+
+def get_cached_objects(model, doc_type, pks):
+    """
+    Returns ``{pk: obj}`` for the objects of ``pks`` found in the object cache.
+    """
+    cache = get_object_cache()
+
+    if cache is None or not pks:
+        return {}
+
+    keys = [object_cache_key(model, doc_type, pk) for pk in pks]
+    return dict((obj.pk, obj) for obj in cache.get_many(keys).values())
+
+
+def cache_objects(model, doc_type, objects):
+    """
+    Stores ``objects`` (an iterable of instances) in the object cache for
+    ``SANJAB_OBJECT_CACHE_TIMEOUT`` seconds (300 by default).
+    """
+    cache = get_object_cache()
+
+    if cache is None:
+        return
+
+    data = dict((object_cache_key(model, doc_type, obj.pk), obj) for obj in objects)
+
+    if data:
+        cache.set_many(data, getattr(settings, 'SANJAB_OBJECT_CACHE_TIMEOUT', 300))
+
+
+def invalidate_cached_object(model, doc_types, pk):
+    """Drops the cached copies of an object, for each of its doc types."""
+    cache = get_object_cache()
+
+    if cache is None:
+        return
+
+    cache.delete_many([object_cache_key(model, doc_type, pk) for doc_type in doc_types])
@@ -0,0 +1,184 @@
+from __future__ import print_function, unicode_literals
+import threading
+
+from django.utils.six.moves import queue
+
+from sanjab.utils import log as logging
+
+_STOP = object()
+
+
+def _close_db_connections():
+    from django.db import connections as db_connections
+
+    for conn in db_connections.all():
+        conn.close()
+
+
+def _prepare_in_process(using, model, doc_type, objs):
+    # Runs in a pool process: look the index up again, as ``SearchIndex`` is
+    # thread-local & can't be pickled.
+    from sanjab import connections
+
+    index = connections[using].get_unified_index().get_index(model)[doc_type]
+    return connections[using].get_backend().prepare_documents(index, objs)
+
+
+class PipelinedIndexer(object):
+    """
+    Indexes a queryset in batches, overlapping the three stages of each
+    batch: fetching it from the database, preparing its documents & sending
+    them to the search engine.
+
+    The calling thread fetches batches, ``prepare_workers`` threads prepare
+    them & ``send_workers`` threads send them, connected by queues holding at
+    most ``queue_size`` batches, so memory stays bounded. With a ``pool``
+    (e.g. a ``multiprocessing.Pool``) of ``pool_size`` processes,
+    preparation (CPU-bound template rendering, mostly) runs in its processes
+    instead, with at least one prepare thread per process to keep each busy.
+
+    Indexes with a values plan (see ``SearchIndex.get_values_plan``) are
+    fetched as rows, which leaves little work for the prepare stage.
+    """
+    def __init__(self, backend, index, doc_type, prepare_workers=1, send_workers=1,
+                 queue_size=2, pool=None, pool_size=1, verbosity=1):
+        self.backend = backend
+        self.index = index
+        self.doc_type = doc_type
+        # Each prepare thread waits on the pool for one batch at a time.
+        self.prepare_workers = max(prepare_workers, pool_size if pool is not None else 1, 1)
+        self.send_workers = max(send_workers, 1)
+        self.queue_size = queue_size
+        self.pool = pool
+        self.verbosity = verbosity
+        self.use_values = index.get_values_plan() is not None
+        self.log = logging.getLogger('sanjab')
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._errors = []
+        self._lock = threading.Lock()
+
+    def run(self, qs, batch_size, total=None, commit=True):
+        """
+        Indexes ``qs`` in batches of ``batch_size``. Raises the first error
+        any stage ran into, after winding the others down.
+        """
+        if total is None:
+            total = qs.count()
+
+        prepare_queue = queue.Queue(self.queue_size)
+        send_queue = queue.Queue(self.queue_size)
+        preparers = self._start(self.prepare_workers, self._prepare_stage, prepare_queue, send_queue)
+        senders = self._start(self.send_workers, self._send_stage, send_queue, total)
+
+        try:
+            for start in range(0, total, batch_size):
+                if self._stop.is_set():
+                    break
+
+                end = min(start + batch_size, total)
+                self._put(prepare_queue, (start, end, self.fetch(qs, start, end)))
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._finish(preparers, prepare_queue)
+            self._finish(senders, send_queue)
+
+        if self._errors:
+            raise self._errors[0]
+
+        if commit:
+            self.backend.refresh()
+
+    def fetch(self, qs, start, end):
+        # A fresh clone per batch, so the cache doesn't bloat up in memory.
+        current_qs = qs.all()[start:end]
+
+        if self.use_values:
+            return list(self.index.prepare_rows(current_qs))
+
+        return list(current_qs)
+
+    def prepare(self, batch):
+        if self.use_values:
+            return [self.backend.finalize_document(data) for data in batch]
+
+        if self.pool is not None:
+            args = (self.backend.connection_alias, self.index.get_model(), self.doc_type, batch)
+            return self.pool.apply(_prepare_in_process, args)
+
+        return self.backend.prepare_documents(self.index, batch)
+
+    def send(self, docs):
+        result = self.backend.bulk_update(self.doc_type, docs, commit=False)
+
+        # Documents the backend skipped as unchanged.
+        with self._lock:
+            self.skipped += len(getattr(result, 'skipped', None) or [])
+
+    def _prepare_stage(self, in_queue, out_queue):
+        while True:
+            item = in_queue.get()
+
+            if item is _STOP or self._stop.is_set():
+                break
+
+            start, end, batch = item
+            self._put(out_queue, (start, end, self.prepare(batch)))
+
+    def _send_stage(self, in_queue, total):
+        while True:
+            item = in_queue.get()
+
+            if item is _STOP or self._stop.is_set():
+                break
+
+            start, end, docs = item
+            self.send(docs)
+
+            if self.verbosity >= 2:
+                print("  indexed %s - %d of %d." % (start + 1, end, total))
+
+    def _start(self, count, stage, *args):
+        def target():
+            try:
+                stage(*args)
+            except Exception as e:
+                self._fail(e)
+            finally:
+                # Stage threads get their own database connections.
+                _close_db_connections()
+
+        threads = [threading.Thread(target=target) for i in range(count)]
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        return threads
+
+    def _finish(self, threads, in_queue):
+        for thread in threads:
+            self._put(in_queue, _STOP, force=True)
+
+        for thread in threads:
+            thread.join()
+
+    def _put(self, out_queue, item, force=False):
+        # Don't block forever on a queue whose consumers have died.
+        while force or not self._stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if force and self._stop.is_set():
+                    # Make room for the stop marker.
+                    try:
+                        out_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _fail(self, error):
+        self.log.error("Pipelined indexing of '%s' failed: %s", self.doc_type, error)
+        self._errors.append(error)
+        self._stop.set()
@@ -0,0 +1,87 @@
+from __future__ import unicode_literals
+import copy
+import json
+import threading
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Collapses identical requests into one.
+
+    Concurrent callers asking for the same key share a single in-flight call:
+    the first one runs it, the others wait for its result (or exception).
+
+    While a request-scoped memo is active on the current thread (between
+    Django's ``request_started`` & ``request_finished``), successful results
+    are also remembered, so evaluating the same search twice within one
+    request only hits the engine once.
+
+    Only the caller that ran the call gets its result as is; the others get
+    a deep copy, so changes one makes don't leak into another's.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._local = threading.local()
+
+    def start_memo(self, **kwargs):
+        self._local.memo = {}
+
+    def clear_memo(self, **kwargs):
+        self._local.memo = None
+
+    def _get_memo(self):
+        return getattr(self._local, 'memo', None)
+
+    def do(self, key, func, *args, **kwargs):
+        memo = self._get_memo()
+
+        if memo is not None and key in memo:
+            return copy.deepcopy(memo[key])
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func(*args, **kwargs)
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+
+        if memo is not None:
+            memo[key] = call.result
+
+        return call.result if leader else copy.deepcopy(call.result)
+
+
+def request_key(*parts):
+    """
+    Builds a hashable key out of request parts (e.g. a query body), insensitive
+    to dictionary ordering.
+    """
+    return json.dumps(parts, sort_keys=True, default=repr)
+
+
+single_flight = SingleFlight()
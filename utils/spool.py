@@ -0,0 +1,227 @@
+from __future__ import unicode_literals
+import errno
+import glob
+import json
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sanjab.utils import log as logging
+
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows, where a spool is only safe within one process.
+    fcntl = None
+
+try:
+    from elasticsearch.exceptions import ConnectionError, TransportError
+except ImportError:
+    ConnectionError = TransportError = None
+
+
+def is_unavailable(error):
+    """
+    Tells whether ``error`` means the cluster couldn't take the request
+    right now (unreachable, overloaded), rather than refused it.
+    """
+    if ConnectionError is not None and isinstance(error, ConnectionError):
+        return True
+
+    status = getattr(error, 'status_code', None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def latest_operations(operations):
+    """
+    Collapses ``operations`` to the latest state of each document. Partial
+    updates are merged into the document they follow.
+    """
+    latest = {}
+
+    for op in operations:
+        key = (op.get('_type'), op['_id'])
+        previous = latest.get(key)
+
+        if op.get('_op_type') == 'update' and previous is not None and previous.get('_op_type') != 'delete':
+            merged = dict(previous)
+
+            if previous.get('_op_type') == 'update':
+                merged['doc'] = dict(previous['doc'], **op['doc'])
+            else:
+                merged.update(op['doc'])
+
+            op = merged
+
+        # Re-insert, so replay follows the order of the last changes.
+        latest.pop(key, None)
+        latest[key] = op
+
+    return list(latest.values())
+
+
+class Spool(object):
+    """
+    A durable, append-only log of the write operations a connection couldn't
+    deliver, replayed once the cluster is back.
+
+    Operations are bulk actions (documents with ``_id``, ``_type`` & an
+    optional ``_op_type``), appended as JSON lines to ``<name>.log`` in
+    ``path`` & fsynced. Draining first moves that segment aside, so writes
+    keep going to a fresh one, then replays the latest state of each
+    document. A segment is only deleted once it has been fully replayed.
+
+    Several processes may share a spool: appends hold a shared ``flock`` on
+    ``<name>.lock`` that setting the active segment aside waits for, & only
+    one process drains at a time, under ``<name>.drain.lock``.
+    """
+    def __init__(self, path, name, serializer=None):
+        self.path = path
+        self.name = name
+        self.serializer = serializer
+        self.log = logging.getLogger('sanjab')
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._drainer = None
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    @property
+    def active_segment(self):
+        return os.path.join(self.path, '%s.log' % self.name)
+
+    @contextmanager
+    def _flock(self, suffix, operation):
+        with open(os.path.join(self.path, '%s.%s' % (self.name, suffix)), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), operation)
+
+            # Closing the file releases the ``flock``.
+            yield
+
+    def _dumps(self, op):
+        if self.serializer is not None:
+            return self.serializer.dumps(op)
+
+        return json.dumps(op)
+
+    def append(self, operations):
+        """Durably records ``operations``."""
+        lines = ''.join('%s\n' % self._dumps(op) for op in operations)
+
+        with self._lock, self._flock('lock', fcntl and fcntl.LOCK_SH):
+            with open(self.active_segment, 'ab') as segment:
+                segment.write(lines.encode('utf-8'))
+                segment.flush()
+                os.fsync(segment.fileno())
+
+    def pending(self):
+        """Tells whether some operations are waiting to be replayed."""
+        return bool(self.segments())
+
+    def segments(self, include_active=True):
+        draining = sorted(glob.glob(os.path.join(self.path, '%s.*.draining' % self.name)))
+
+        if include_active and os.path.exists(self.active_segment) and os.path.getsize(self.active_segment):
+            draining.append(self.active_segment)
+
+        return draining
+
+    def read(self, segment):
+        operations = []
+
+        if not os.path.getsize(segment):
+            return operations
+
+        with open(segment, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            try:
+                for line in iter(data.readline, b''):
+                    line = line.strip()
+
+                    if not line:
+                        continue
+
+                    try:
+                        operations.append(json.loads(line.decode('utf-8')))
+                    except ValueError:
+                        # A write torn by a crash.
+                        self.log.warning("Skipping a corrupt line in spool segment '%s'.", segment)
+            finally:
+                data.close()
+
+        return operations
+
+    def drain(self, send):
+        """
+        Replays the spooled operations through ``send`` (which takes a list
+        of operations & raises if they can't be delivered). Returns the
+        number of operations replayed.
+        """
+        with self._drain_lock, self._flock('drain.lock', fcntl and fcntl.LOCK_EX):
+            with self._lock, self._flock('lock', fcntl and fcntl.LOCK_EX):
+                if os.path.exists(self.active_segment) and os.path.getsize(self.active_segment):
+                    os.rename(self.active_segment, os.path.join(
+                        self.path, '%s.%d.%d.draining' % (self.name, int(time.time() * 1000), os.getpid())))
+
+                # Only segments set aside: the active one may be written to.
+                segments = self.segments(include_active=False)
+
+            if not segments:
+                return 0
+
+            operations = []
+
+            for segment in segments:
+                operations.extend(self.read(segment))
+
+            operations = latest_operations(operations)
+
+            if operations:
+                send(operations)
+
+            for segment in segments:
+                try:
+                    os.remove(segment)
+                except OSError as e:
+                    if e.errno != errno.ENOENT:
+                        raise
+
+            return len(operations)
+
+    def start_drainer(self, send, is_healthy, interval=5.0):
+        """
+        Starts a background thread draining the spool through ``send`` every
+        ``interval`` seconds while ``is_healthy()`` says the cluster is up.
+        """
+        with self._lock:
+            if self._drainer is not None:
+                return
+
+            self._drainer = threading.Thread(target=self._drain_forever, args=(send, is_healthy, interval))
+            self._drainer.daemon = True
+            self._drainer.start()
+
+    def _drain_forever(self, send, is_healthy, interval):
+        while True:
+            with self._lock:
+                # Checked under the lock ``append`` holds, so whatever gets
+                # spooled after this either is seen here or starts a drainer.
+                if not self.pending():
+                    self._drainer = None
+                    return
+
+            try:
+                if is_healthy():
+                    replayed = self.drain(send)
+                    self.log.info("Replayed %d spooled operations for '%s'.", replayed, self.name)
+                    # Catch up with what was spooled meanwhile straight away.
+                    continue
+            except Exception as e:
+                self.log.error("Replaying the spool of '%s' failed, will retry: %s", self.name, e)
+
+            time.sleep(interval)
@@ -0,0 +1,185 @@
+from __future__ import unicode_literals
+import datetime
+import hashlib
+import json
+import shelve
+import threading
+from contextlib import contextmanager
+
+from django.utils import six
+
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows, where stores are only safe within one process.
+    fcntl = None
+
+from sanjab.constants import CONTENT_HASH
+
+
+def _canonical_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, (set, frozenset)):
+        return sorted(value)
+    elif isinstance(value, six.binary_type):
+        return six.text_type(value, 'utf-8', 'replace')
+
+    return six.text_type(value)
+
+
+def document_hash(doc):
+    """
+    Returns a stable hash of a prepared document: the same content always
+    hashes the same, whatever the key order or the process.
+    """
+    content = dict((key, value) for key, value in doc.items() if key not in ('_id', '_type', CONTENT_HASH))
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), default=_canonical_default)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def locked_shelf(path, lock):
+    """
+    Opens the ``shelve`` file at ``path`` for the duration of the block,
+    holding ``lock`` against the other threads & an exclusive ``flock`` on
+    ``<path>.lock`` against the other processes.
+    """
+    with lock:
+        lock_file = open('%s.lock' % path, 'a')
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+            shelf = shelve.open(path)
+
+            try:
+                yield shelf
+            finally:
+                shelf.close()
+        finally:
+            # Closing the file releases the ``flock``.
+            lock_file.close()
+
+
+class BaseHashStore(object):
+    """
+    Remembers the content hash of each indexed document, so unchanged
+    documents can be skipped on the next update.
+    """
+    def get_many(self, doc_type, ids):
+        """Returns ``{id: hash}`` for the ``ids`` with a known hash."""
+        raise NotImplementedError
+
+    def set_many(self, doc_type, hashes):
+        """Records ``hashes`` (``{id: hash}``) once documents were sent."""
+        raise NotImplementedError
+
+    def delete_many(self, doc_type, ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class FileHashStore(BaseHashStore):
+    """
+    Keeps hashes in a local ``shelve`` file, opened under a file lock for
+    each batch, so threads & processes (e.g. ``update_index --workers``) can
+    share it.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _key(self, doc_type, doc_id):
+        key = '%s:%s' % (doc_type, doc_id)
+
+        # ``shelve`` wants native string keys.
+        if six.PY2:
+            key = key.encode('utf-8')
+
+        return key
+
+    def get_many(self, doc_type, ids):
+        hashes = {}
+
+        with locked_shelf(self.path, self._lock) as shelf:
+            for doc_id in ids:
+                key = self._key(doc_type, doc_id)
+
+                if key in shelf:
+                    hashes[doc_id] = shelf[key]
+
+        return hashes
+
+    def set_many(self, doc_type, hashes):
+        with locked_shelf(self.path, self._lock) as shelf:
+            for doc_id, doc_hash in hashes.items():
+                shelf[self._key(doc_type, doc_id)] = doc_hash
+
+    def delete_many(self, doc_type, ids):
+        with locked_shelf(self.path, self._lock) as shelf:
+            for doc_id in ids:
+                shelf.pop(self._key(doc_type, doc_id), None)
+
+    def clear(self):
+        with locked_shelf(self.path, self._lock) as shelf:
+            shelf.clear()
+
+
+class DocumentHashStore(BaseHashStore):
+    """
+    Keeps each hash in the ``CONTENT_HASH`` field of the document itself &
+    fetches them back in bulk from the backend. Nothing to maintain on the
+    side, at the cost of one extra round-trip per batch.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_many(self, doc_type, ids):
+        return self.backend.get_content_hashes(doc_type, ids)
+
+    def set_many(self, doc_type, hashes):
+        # Sent along with the documents.
+        pass
+
+    def delete_many(self, doc_type, ids):
+        pass
+
+    def clear(self):
+        pass
+
+
+class FileCheckpointStore(object):
+    """
+    Keeps the high-water mark of incremental indexing runs (see
+    ``update_index --since-last``) per connection & doc type, in a local
+    ``shelve`` file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _key(self, alias, doc_type):
+        key = '%s:%s' % (alias, doc_type)
+
+        # ``shelve`` wants native string keys.
+        if six.PY2:
+            key = key.encode('utf-8')
+
+        return key
+
+    def get(self, alias, doc_type):
+        """Returns the last acknowledged ``(updated, pk)`` or ``None``."""
+        with locked_shelf(self.path, self._lock) as shelf:
+            return shelf.get(self._key(alias, doc_type))
+
+    def set(self, alias, doc_type, checkpoint):
+        with locked_shelf(self.path, self._lock) as shelf:
+            shelf[self._key(alias, doc_type)] = checkpoint
+
+    def delete(self, alias, doc_type):
+        with locked_shelf(self.path, self._lock) as shelf:
+            shelf.pop(self._key(alias, doc_type), None)